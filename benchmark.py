@@ -0,0 +1,308 @@
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# Never open a window, even when a display is available
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+
+from engines import ENGINES
+from renderers import RENDERERS
+from simulation import PATTERNS, Simulation
+from snapshot import Snapshot
+
+# Board edge lengths for the engine suite
+SIZES = [100, 1000, 10000]
+QUICK_SIZES = [100, 1000]
+
+# Starting boards: a seeded randomize (about half the cells alive), a seeded
+# 5% soup, a settled soup, and single patterns centered on an otherwise empty
+# board
+WORKLOADS = ["random", "soup", "settled", "pulsar"]
+
+SOUP_DENSITY = 0.05
+SEED = 42
+
+# The settled board: a seeded randomize of a SETTLE_SIZE torus run for
+# SETTLE_GENERATIONS, by when it is mostly still lifes and blinkers, repeated
+# across the board
+SETTLE_SIZE = 500
+SETTLE_GENERATIONS = 3000
+
+# Largest board, in cells, each engine is run on; the pure-Python engines
+# would take minutes per generation beyond these, and the batch engine holds
+# BATCH_BOARDS boards of the size
+MAX_CELLS = {
+    "list": 200 * 200,
+    "sparse": 1000 * 1000,
+    "hashlife": 1000 * 1000,
+    "batch": 1000 * 1000,
+}
+
+# Seconds spent on each measurement and how often it is repeated; the best
+# repeat is reported
+MIN_TIME = 1.0
+QUICK_MIN_TIME = 0.2
+REPEATS = 3
+
+# Renderer suite: the game panel size and the cell sizes drawn into it
+PANEL_SIZE = (800, 600)
+CELL_SIZES = [2, 4, 10]
+FRAMES = 60
+
+# I/O suite: board sizes and the formats saved and loaded
+IO_SIZES = [1000, 4000]
+IO_FORMATS = {
+    "snapshot-zlib": ("board.gol", {"compression": "zlib"}),
+    "snapshot-lzma": ("board.gol", {"compression": "lzma"}),
+    "snapshot-none": ("board.gol", {"compression": "none"}),
+    "text": ("board.txt", {}),
+    "rle": ("board.rle", {}),
+}
+# Text files are slow to parse; skip them for boards larger than this
+MAX_TEXT_CELLS = 1000 * 1000
+
+THEME = {"alive": (50, 205, 50), "dead": (15, 15, 15), "grid": (30, 30, 30), "panel": (25, 25, 25)}
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def best_rate(run, min_time, repeats):
+    # run() does one unit of work; returns the best units per second over the
+    # repeats, each lasting at least min_time, and the units done in total
+    best, total = 0.0, 0
+    for _ in range(repeats):
+        units = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time or units == 0:
+            run()
+            units += 1
+            elapsed = time.perf_counter() - start
+        best = max(best, units / elapsed)
+        total += units
+    return best, total
+
+
+@functools.lru_cache(maxsize=None)
+def settled_tile():
+    # Run once and shared by every engine and size
+    simulation = Simulation(SETTLE_SIZE, SETTLE_SIZE, "numpy", seed=SEED, boundary="torus")
+    simulation.randomize()
+    simulation.step(SETTLE_GENERATIONS)
+    return simulation.engine.to_array().copy()
+
+
+def setup_board(simulation, workload):
+    if workload == "random":
+        simulation.randomize()
+    elif workload == "soup":
+        simulation.randomize(SOUP_DENSITY)
+    elif workload == "settled":
+        width, height = simulation.width, simulation.height
+        repeats = (-(-height // SETTLE_SIZE), -(-width // SETTLE_SIZE))
+        cells = np.tile(settled_tile(), repeats)[:height, :width]
+        simulation.load_board(Snapshot(cells, None, None, ""))
+    else:
+        simulation.load_pattern(workload)
+
+
+def bench_engines(engines, sizes, workloads, min_time, repeats):
+    results = []
+    for engine in engines:
+        for size in sizes:
+            if size * size > MAX_CELLS.get(engine, float("inf")):
+                continue
+            for workload in workloads:
+                simulation = Simulation(size, size, engine, seed=SEED)
+                setup_board(simulation, workload)
+                # One untimed generation to warm caches and thread pools
+                simulation.step()
+                rate, generations = best_rate(simulation.step, min_time, repeats)
+                # Only the viewed board of a batch is set up, but every board
+                # is stepped
+                boards = getattr(simulation.engine, "boards", 1)
+                results.append({
+                    "suite": "engine",
+                    "engine": engine,
+                    "size": size,
+                    "workload": workload,
+                    "generations": generations,
+                    "gen_per_sec": rate,
+                    "cells_per_sec": rate * size * size * boards,
+                })
+                log(f"engine {engine:>9} {size:>5}^2 {workload:>7}: {rate:10.1f} gen/s")
+                simulation.close()
+    return results
+
+
+def bench_renderers(renderers, cell_sizes, min_time, repeats):
+    results = []
+    pygame.display.init()
+    width, height = PANEL_SIZE
+    screen = pygame.display.set_mode(PANEL_SIZE)
+    for name in renderers:
+        for cell_size in cell_sizes:
+            for show_grid in (False, True):
+                renderer = RENDERERS[name]()
+                simulation = Simulation(width // cell_size, height // cell_size, seed=SEED)
+                simulation.randomize()
+                # A fresh generation every frame, as while the game runs;
+                # only the drawing is timed
+                boards = []
+                for _ in range(FRAMES):
+                    simulation.step()
+                    boards.append(simulation.engine.to_array().copy())
+                boards = itertools.cycle(boards)
+
+                def draw():
+                    renderer.draw(screen, next(boards), cell_size, THEME, show_grid, width, height)
+
+                rate, frames = best_rate(draw, min_time, repeats)
+                results.append({
+                    "suite": "renderer",
+                    "renderer": name,
+                    "cell_size": cell_size,
+                    "show_grid": show_grid,
+                    "frames": frames,
+                    "frame_ms": 1000.0 / rate,
+                })
+                log(f"render {name:>9} cell {cell_size:>2} grid {show_grid!s:>5}: {1000.0 / rate:8.2f} ms/frame")
+    pygame.display.quit()
+    return results
+
+
+def bench_io(sizes, workloads, formats, min_time, repeats):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            for workload in workloads:
+                simulation = Simulation(size, size, seed=SEED)
+                setup_board(simulation, workload)
+                target = Simulation(size, size)
+                for fmt in formats:
+                    filename, options = IO_FORMATS[fmt]
+                    if fmt == "text" and size * size > MAX_TEXT_CELLS:
+                        continue
+                    path = os.path.join(directory, filename)
+                    save_rate, _ = best_rate(lambda: simulation.save(path, **options), min_time, repeats)
+                    file_size = os.path.getsize(path)
+                    if fmt == "rle":
+                        load = lambda: target.place_pattern(path, reset=True)
+                    else:
+                        load = lambda: target.load(path)
+                    load_rate, _ = best_rate(load, min_time, repeats)
+                    results.append({
+                        "suite": "io",
+                        "format": fmt,
+                        "size": size,
+                        "workload": workload,
+                        "file_bytes": file_size,
+                        "save_ms": 1000.0 / save_rate,
+                        "load_ms": 1000.0 / load_rate,
+                        "save_cells_per_sec": save_rate * size * size,
+                        "load_cells_per_sec": load_rate * size * size,
+                    })
+                    log(f"io {fmt:>13} {size:>5}^2 {workload:>7}: save {1000.0 / save_rate:8.1f} ms, "
+                        f"load {1000.0 / load_rate:8.1f} ms, {file_size} bytes")
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def result_key(result):
+    # Everything but the measurements identifies a benchmark case
+    measured = {"generations", "gen_per_sec", "cells_per_sec", "frames", "frame_ms", "file_bytes",
+                "save_ms", "load_ms", "save_cells_per_sec", "load_cells_per_sec"}
+    return tuple(sorted((k, v) for k, v in result.items() if k not in measured))
+
+
+def compare(results, baseline_path):
+    # Print the change against an earlier run; positive is faster
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        if result["suite"] == "engine":
+            change = result["gen_per_sec"] / old["gen_per_sec"] - 1
+        elif result["suite"] == "renderer":
+            change = old["frame_ms"] / result["frame_ms"] - 1
+        else:
+            change = (old["save_ms"] + old["load_ms"]) / (result["save_ms"] + result["load_ms"]) - 1
+        case = ", ".join(f"{k}={v}" for k, v in result_key(result))
+        log(f"{change:+7.1%}  {case}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engines, renderers and save/load")
+    parser.add_argument("--suites", nargs="+", choices=["engine", "renderer", "io"],
+                        default=["engine", "renderer", "io"], help="suites to run (default: all)")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--renderers", nargs="+", choices=list(RENDERERS), default=list(RENDERERS))
+    parser.add_argument("--sizes", nargs="+", type=int, help=f"board edge lengths (default: {SIZES})")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS + [p for p in PATTERNS if p not in WORKLOADS],
+                        default=WORKLOADS, help="starting boards: random, soup, settled or a pattern name")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"boards up to {QUICK_SIZES[-1]}^2, shorter measurements, one repeat")
+    parser.add_argument("--out", help="file to write the JSON results to (default: stdout)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    min_time = QUICK_MIN_TIME if args.quick else MIN_TIME
+    repeats = 1 if args.quick else REPEATS
+
+    results = []
+    if "engine" in args.suites:
+        results += bench_engines(args.engines, sizes, args.workloads, min_time, repeats)
+    if "renderer" in args.suites:
+        results += bench_renderers(args.renderers, CELL_SIZES, min_time, repeats)
+    if "io" in args.suites:
+        io_sizes = [size for size in IO_SIZES if size <= max(sizes)] or IO_SIZES[:1]
+        results += bench_io(io_sizes, ["random", "soup"], list(IO_FORMATS), min_time, repeats)
+
+    report = {"environment": environment(), "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
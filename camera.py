@@ -0,0 +1,59 @@
+import math
+
+
+class Camera:
+    # View onto the world: (x, y) is the world position, in cells, at the
+    # top-left corner of the view, and scale is the cell size in pixels, so
+    # world point (wx, wy) is drawn at ((wx - x) * scale, (wy - y) * scale).
+    # Zooming, panning and resizing the view only change these numbers; the
+    # world itself is never reallocated or rewritten.
+    def __init__(self, scale, min_scale=1, max_scale=None, x=0.0, y=0.0):
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.scale = self._clamp(scale)
+        self.x = x
+        self.y = y
+
+    def _clamp(self, scale):
+        scale = max(self.min_scale, scale)
+        return min(self.max_scale, scale) if self.max_scale else scale
+
+    def to_world(self, px, py):
+        # Cell under a pixel of the view; may lie outside the world
+        return math.floor(self.x + px / self.scale), math.floor(self.y + py / self.scale)
+
+    def to_screen(self, wx, wy):
+        # Pixel of the view at the top-left corner of a cell
+        return round((wx - self.x) * self.scale), round((wy - self.y) * self.scale)
+
+    def zoom(self, scale, px, py):
+        # Change the scale, keeping the world point under pixel (px, py) in
+        # place
+        scale = self._clamp(scale)
+        wx, wy = self.x + px / self.scale, self.y + py / self.scale
+        self.scale = scale
+        self.x, self.y = wx - px / scale, wy - py / scale
+
+    def pan(self, dx, dy):
+        # Move the view contents by (dx, dy) pixels
+        self.x -= dx / self.scale
+        self.y -= dy / self.scale
+
+    def center(self, world_width, world_height, view_width, view_height):
+        self.x = (world_width - view_width / self.scale) / 2
+        self.y = (world_height - view_height / self.scale) / 2
+
+    def resize(self, old_width, old_height, width, height):
+        # Keep the world point at the center of the view in place
+        self.x += (old_width - width) / 2 / self.scale
+        self.y += (old_height - height) / 2 / self.scale
+
+    def visible(self, world_width, world_height, view_width, view_height):
+        # The part of the world inside the view as the cell range
+        # (x0, y0, x1, y1), end exclusive and possibly empty, and the pixel
+        # at which cell (x0, y0) is drawn
+        x0 = min(max(0, math.floor(self.x)), world_width)
+        y0 = min(max(0, math.floor(self.y)), world_height)
+        x1 = max(x0, min(world_width, math.ceil(self.x + view_width / self.scale)))
+        y1 = max(y0, min(world_height, math.ceil(self.y + view_height / self.scale)))
+        return (x0, y0, x1, y1), self.to_screen(x0, y0)
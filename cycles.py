@@ -0,0 +1,101 @@
+from collections import deque, namedtuple
+
+import numpy as np
+
+# Generations of hashes kept; periods up to this long are detected
+HISTORY = 1024
+
+# Fixed seed, so a board hashes the same in every run
+ZOBRIST_SEED = 0x5EED
+
+# What to do when a cycle is found: keep stepping, stop the run, or start
+# over from a new random board
+ACTIONS = ["report", "stop", "reseed"]
+
+# generation: when the repeat was seen; period: generations between the two
+# equal boards; kind: "extinct", "still life" or "oscillator" (a period-p
+# repeat of the whole board, which includes several oscillators of different
+# periods and, with wrapping edges, spaceships)
+Cycle = namedtuple("Cycle", ["generation", "period", "kind"])
+
+
+class CycleDetector:
+    # Zobrist hash of the board: every cell has a random 64-bit key and the
+    # hash is the XOR of the keys of the live cells. Toggling a cell toggles
+    # its key in the hash, so each generation only the cells that changed
+    # are hashed; engines that track their changes say which those are,
+    # otherwise the board is compared with a copy of the last one. Cells in
+    # the dying states of Generations rules contribute their key times a
+    # random odd factor per state. The last `history` hashes are kept with
+    # their generation; finding the new hash among them is a repeat of the
+    # whole board.
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self._keys = None
+        rng = np.random.default_rng(ZOBRIST_SEED + 1)
+        self._factors = rng.integers(0, 2 ** 63, size=256, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._factors[:2] = (0, 1)
+        self.reset()
+
+    def reset(self):
+        # Forget the history, e.g. after the board was edited
+        self._previous = None
+        self._hash = 0
+        self._seen = {}
+        self._order = deque()
+        self.cycle = None
+
+    def update(self, generation, cells, changed=None):
+        # Hash the board at `generation`; returns a Cycle the first time the
+        # board repeats after a reset, otherwise None. changed, if known,
+        # holds the flat indices of every cell that changed since the last
+        # update.
+        previous = self._previous
+        if previous is None or previous.shape != cells.shape:
+            if self._keys is None or self._keys.size != cells.size:
+                rng = np.random.default_rng(ZOBRIST_SEED)
+                self._keys = rng.integers(0, 2 ** 64, size=cells.size, dtype=np.uint64)
+            self._previous = previous = np.array(cells, dtype=np.uint8)
+            occupied = np.flatnonzero(previous)
+            self._hash = self._contribution(occupied, previous.reshape(-1)[occupied])
+        else:
+            if changed is None:
+                changed = np.flatnonzero(cells != previous)
+            if changed.size:
+                flat = previous.reshape(-1)
+                # Engine boards may be views with row padding, which
+                # reshape(-1) would copy whole
+                old, new = flat[changed], cells[np.unravel_index(changed, cells.shape)]
+                if old.max() > 1 or new.max() > 1:
+                    self._hash ^= self._contribution(changed, old) ^ self._contribution(changed, new)
+                else:
+                    # Live and dead only: every change flips the cell's key
+                    self._hash ^= int(np.bitwise_xor.reduce(self._keys[changed]))
+                flat[changed] = new
+
+        seen = self._seen.get(self._hash)
+        found = None
+        if seen is not None and self.cycle is None:
+            period = generation - seen
+            if not previous.any():
+                kind = "extinct"
+            elif period == 1:
+                kind = "still life"
+            else:
+                kind = "oscillator"
+            self.cycle = found = Cycle(generation, period, kind)
+
+        self._seen[self._hash] = generation
+        self._order.append((generation, self._hash))
+        if len(self._order) > self.history:
+            old_generation, old_hash = self._order.popleft()
+            if self._seen.get(old_hash) == old_generation:
+                del self._seen[old_hash]
+        return found
+
+    def _contribution(self, positions, states):
+        keys = self._keys[positions]
+        if states.size and (states.max() > 1 or not states.all()):
+            # Dead cells get factor 0, live ones 1
+            keys = keys * self._factors[states]
+        return int(np.bitwise_xor.reduce(keys))
@@ -0,0 +1,1239 @@
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from cycles import HISTORY, ZOBRIST_SEED
+from hashlife import HashLife
+from rules import CONWAY, parse_rule
+
+# Offsets of the eight Moore neighbors
+NEIGHBOR_OFFSETS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+# Edge length of the change-tracking tiles used by the tiled engine
+TILE_SIZE = 32
+# Share of active tiles above which the tiled engine steps the whole board
+DENSE_TILE_FRACTION = 0.5
+
+# changed_cells compares every cell once more than one word in this many
+# cells has changed
+CHANGED_WORDS_DIVISOR = 64
+
+# Boards stepped together by the batch engine by default
+BATCH_BOARDS = 16
+
+# What lies beyond the board edge: dead or live cells, the opposite edge
+# (torus), or the opposite edge for columns and the mirrored opposite edge
+# for rows (Klein bottle)
+BOUNDARIES = ["dead", "alive", "torus", "klein"]
+DEFAULT_BOUNDARY = "dead"
+
+# Share of live cells in a random board
+DENSITY = 0.5
+# Cells drawn at a time for soups of other densities, bounding the memory of
+# the uniform draws on very large boards
+SOUP_CHUNK_CELLS = 1 << 22
+
+
+def random_soup(width, height, density=DENSITY, rng=None, region=None):
+    # A (height, width) board, dead except inside region (x, y, w, h; the
+    # whole board by default), where each cell is alive with probability
+    # density. At density 0.5 each row is drawn as whole random bytes, eight
+    # cells per byte; other densities compare one uniform draw per cell, a
+    # block of rows at a time, which gives the same board as one draw for
+    # the whole region.
+    if rng is None:
+        rng = np.random.default_rng()
+    board = np.zeros((height, width), dtype=np.uint8)
+    x, y, w, h = region or (0, 0, width, height)
+    x0, y0, x1, y1 = max(0, x), max(0, y), min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        return board
+    w, h = x1 - x0, y1 - y0
+    soup = board[y0:y1, x0:x1]
+    if density == DENSITY:
+        data = rng.integers(0, 256, (h, (w + 7) // 8), dtype=np.uint8)
+        soup[:] = np.unpackbits(data, axis=1, bitorder="little")[:, :w]
+    else:
+        rows = max(1, SOUP_CHUNK_CELLS // w)
+        for start in range(0, h, rows):
+            block = soup[start:start + rows]
+            np.less(rng.random(block.shape), density, out=block, casting="unsafe")
+    return board
+
+
+def count_neighbors(padded, out=None):
+    # Live-neighbor counts for the interior of a board with a one-cell border
+    h, w = padded.shape[0] - 2, padded.shape[1] - 2
+    if out is None:
+        out = np.empty((h, w), dtype=np.uint8)
+    np.copyto(out, padded[0:h, 0:w])
+    for dy, dx in ((0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+        np.add(out, padded[dy:dy + h, dx:dx + w], out=out)
+    return out
+
+
+def fill_halo(padded, boundary, width, height, boards=Ellipsis):
+    # Fill the one-cell border around the board held in
+    # padded[1:height + 1, 1:width + 1], so neighbor counts over the padded
+    # buffer see the boundary without any bounds checks. For a stack of
+    # boards, `boards` indexes the ones to fill along the first axis.
+    b = boards
+    if boundary in ("dead", "alive"):
+        value = 1 if boundary == "alive" else 0
+        padded[b, 0, :width + 2] = value
+        padded[b, height + 1, :width + 2] = value
+        padded[b, :height + 2, 0] = value
+        padded[b, :height + 2, width + 1] = value
+        return
+    first, last = padded[b, 1, 1:width + 1], padded[b, height, 1:width + 1]
+    if boundary == "klein":
+        first, last = first[..., ::-1], last[..., ::-1]
+    padded[b, 0, 1:width + 1] = last
+    padded[b, height + 1, 1:width + 1] = first
+    # Columns last, so the corners pick up the wrapped rows
+    padded[b, :height + 2, 0] = padded[b, :height + 2, width]
+    padded[b, :height + 2, width + 1] = padded[b, :height + 2, 1]
+
+
+def shift_board(old, width, height, x_offset=0, y_offset=0):
+    # Copy of a board in a new one of the given size, shifted by
+    # (x_offset, y_offset) and cropped to the new bounds
+    new = np.zeros((height, width), dtype=np.uint8)
+    src_x, src_y = max(0, -x_offset), max(0, -y_offset)
+    dst_x, dst_y = max(0, x_offset), max(0, y_offset)
+    copy_w = min(old.shape[1] - src_x, width - dst_x)
+    copy_h = min(old.shape[0] - src_y, height - dst_y)
+    if copy_w > 0 and copy_h > 0:
+        new[dst_y:dst_y + copy_h, dst_x:dst_x + copy_w] = \
+            old[src_y:src_y + copy_h, src_x:src_x + copy_w]
+    return new
+
+
+def changed_cells(old, new, width, height):
+    # Flat board indices of the cells that differ between two boards held in
+    # bordered (height + 2, width + 2) buffers. The buffers are compared
+    # eight cells per word first, so a settled board costs an eighth of a
+    # cell-by-cell comparison; differences in the borders are left out.
+    a, b = old.reshape(-1), new.reshape(-1)
+    n = a.size // 8 * 8
+    words = np.flatnonzero(a[:n].view(np.uint64) != b[:n].view(np.uint64))
+    if words.size > a.size // CHANGED_WORDS_DIVISOR:
+        # Busy board: picking the changed cells out of their words costs
+        # more than comparing every cell
+        return np.flatnonzero(new[1:-1, 1:-1] != old[1:-1, 1:-1])
+    index = np.concatenate(((words[:, None] * 8 + np.arange(8)).reshape(-1), np.arange(n, a.size)))
+    index = index[a[index] != b[index]]
+    y, x = np.divmod(index, width + 2)
+    inside = (y >= 1) & (y <= height) & (x >= 1) & (x <= width)
+    return (y[inside] - 1) * width + x[inside] - 1
+
+
+def live_plane(padded, rule):
+    # Cells that count as neighbors: the board itself for two-state rules,
+    # state 1 only for Generations rules
+    return padded if rule.states == 2 else (padded == 1).view(np.uint8)
+
+
+class Engine:
+    # Common interface for all stepping engines. Cells are addressed as (x, y)
+    # with 0 <= x < width and 0 <= y < height; a live cell is 1, a dead one 0,
+    # and multistate engines also hold the dying states of Generations rules.
+    # Unbounded engines treat the board as a window onto an infinite plane and
+    # also accept cells outside it; bounded ones take a boundary mode from
+    # BOUNDARIES.
+    name = None
+    bounded = True
+    multistate = False
+    # While track_changes is set, engines that can tell cheaply leave the
+    # cells their last step changed in `changed`, as sorted flat indices into
+    # to_array(); None means unknown
+    track_changes = False
+    changed = None
+
+    def __init__(self, width, height, rule=CONWAY, boundary=DEFAULT_BOUNDARY):
+        self.width = width
+        self.height = height
+        self.generation = 0
+        self.rule = self._check_rule(rule)
+        self.boundary = self._check_boundary(boundary)
+        self.reset()
+
+    @classmethod
+    def supports_boundary(cls, boundary):
+        # The unbounded engines have no edge, which only the default allows
+        return boundary in BOUNDARIES and (cls.bounded or boundary == DEFAULT_BOUNDARY)
+
+    def _check_boundary(self, boundary):
+        if not self.supports_boundary(boundary):
+            raise ValueError(f"The {self.name} engine does not support the {boundary} boundary")
+        return boundary
+
+    def set_boundary(self, boundary):
+        self.boundary = self._check_boundary(boundary)
+
+    @classmethod
+    def supports(cls, rule):
+        # Unbounded engines cannot give birth to cells with no live
+        # neighbors, as that would fill the infinite plane
+        rule = parse_rule(rule)
+        return (rule.states == 2 or cls.multistate) and (cls.bounded or 0 not in rule.birth)
+
+    def _check_rule(self, rule):
+        rule = parse_rule(rule)
+        if not self.supports(rule):
+            raise ValueError(f"The {self.name} engine does not support the rule {rule.string}")
+        return rule
+
+    def set_rule(self, rule):
+        # Switch rules, keeping the board; states the new rule does not have
+        # become dead
+        rule = self._check_rule(rule)
+        states = self.rule.states
+        self.rule = rule
+        if rule.states < states:
+            cells = self.to_array().copy()
+            cells[cells >= rule.states] = 0
+            self.load_array(cells)
+
+    def reset(self):
+        raise NotImplementedError
+
+    def step(self):
+        raise NotImplementedError
+
+    def get_cell(self, x, y):
+        raise NotImplementedError
+
+    def set_cell(self, x, y, value):
+        raise NotImplementedError
+
+    def to_array(self):
+        # Dense (height, width) uint8 view of the board. Engines may hand out
+        # their internal buffer, so callers must treat it as read-only.
+        raise NotImplementedError
+
+    def load_array(self, array):
+        # Replace the board with a dense array; the board takes its shape.
+        raise NotImplementedError
+
+    def window(self, x0, y0, x1, y1):
+        # Copy of the cells in [x0, x1) x [y0, y1) as a (y1 - y0, x1 - x0)
+        # array, for reading part of a large board without converting all of
+        # it. Bounded engines take rectangles inside the board; unbounded
+        # ones take any rectangle of the plane.
+        return self.to_array()[y0:y1, x0:x1].copy()
+
+    def toggle_cell(self, x, y):
+        # Any live or dying state turns dead
+        self.set_cell(x, y, 0 if self.get_cell(x, y) else 1)
+
+    def set_cells(self, cells, value=1):
+        # Set every (x, y) in an (n, 2) array-like to the same value
+        for x, y in np.asarray(cells).reshape(-1, 2).tolist():
+            self.set_cell(x, y, value)
+
+    def jump(self, generations):
+        # Bounded boards are stepped: on an unbounded HashLife universe, cells
+        # born past the edge would feed back into the board. The unbounded
+        # engines fast-forward through HashLife instead.
+        for _ in range(generations):
+            self.step()
+
+    def randomize(self, rng=None, density=DENSITY, region=None):
+        # A random_soup board; a given seed yields the same board whatever
+        # the engine
+        self.load_array(random_soup(self.width, self.height, density, rng, region))
+
+    def population(self):
+        # Live cells, kept up to date by the engine as it steps and edits
+        return self._population
+
+    def resize(self, width, height, x_offset=0, y_offset=0):
+        self.load_array(shift_board(self.to_array(), width, height, x_offset, y_offset))
+
+    def close(self):
+        # Release threads the engine holds; it is not stepped afterwards
+        pass
+
+
+class ListEngine(Engine):
+    # Reference engine: a list of lists stepped cell by cell in pure Python
+    name = "list"
+    multistate = True
+
+    def reset(self):
+        self.grid = [[0] * self.width for _ in range(self.height)]
+        self._population = 0
+
+    def step(self):
+        new_grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
+        table = self.rule.table.tolist()
+        population = 0
+        for y in range(self.height):
+            for x in range(self.width):
+                alive_neighbors = self.count_alive_neighbors(x, y)
+                new_grid[y][x] = table[self.grid[y][x]][alive_neighbors]
+                if new_grid[y][x]:
+                    population += 1
+        self.grid = new_grid
+        self._population = population
+        self.generation += 1
+
+    def count_alive_neighbors(self, x, y):
+        # Checks every neighbor against the board edge and maps it through the
+        # boundary; the other engines must agree with this
+        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+        count = 0
+        for dx, dy in directions:
+            nx, ny = x + dx, y + dy
+            if self.boundary in ("torus", "klein"):
+                if not 0 <= ny < self.height:
+                    ny %= self.height
+                    if self.boundary == "klein":
+                        nx = self.width - 1 - nx
+                nx %= self.width
+            elif not (0 <= nx < self.width and 0 <= ny < self.height):
+                if self.boundary == "alive":
+                    count += 1
+                continue
+            if self.grid[ny][nx] == 1:
+                count += 1
+        return count
+
+    def get_cell(self, x, y):
+        return self.grid[y][x]
+
+    def set_cell(self, x, y, value):
+        self._population += bool(value) - bool(self.grid[y][x])
+        self.grid[y][x] = value
+
+    def to_array(self):
+        return np.array(self.grid, dtype=np.uint8).reshape(self.height, self.width)
+
+    def window(self, x0, y0, x1, y1):
+        rows = [row[x0:x1] for row in self.grid[y0:y1]]
+        return np.array(rows, dtype=np.uint8).reshape(y1 - y0, x1 - x0)
+
+    def load_array(self, array):
+        array = np.asarray(array, dtype=np.uint8)
+        self.height, self.width = array.shape
+        self.grid = array.tolist()
+        self._population = int(np.count_nonzero(array))
+
+
+class NumpyEngine(Engine):
+    # Vectorized engine. The board lives in the interior of a uint8 buffer with
+    # a one-cell border of dead cells, so the eight neighbor counts are plain
+    # shifted slices and the rule is applied to the whole board at once.
+    name = "numpy"
+    multistate = True
+
+    def reset(self):
+        self._front = np.zeros((self.height + 2, self.width + 2), dtype=np.uint8)
+        self._back = np.zeros_like(self._front)
+        self._counts = np.zeros((self.height, self.width), dtype=np.uint8)
+        self._population = 0
+
+    @property
+    def grid(self):
+        return self._front[1:-1, 1:-1]
+
+    def step(self):
+        if self.boundary != "dead":
+            fill_halo(self._front, self.boundary, self.width, self.height)
+        counts = count_neighbors(live_plane(self._front, self.rule), self._counts)
+
+        grid = self.grid
+        if self.rule.is_conway:
+            # B3/S23: born with exactly 3 neighbors, survive with 2 or 3
+            alive = (counts == 3) | ((counts == 2) & (grid == 1))
+        else:
+            alive = self.rule.apply(grid, counts)
+        self._back[1:-1, 1:-1] = alive
+        self._population = int(np.count_nonzero(alive))
+        if self.track_changes:
+            self.changed = changed_cells(self._front, self._back, self.width, self.height)
+        self._front, self._back = self._back, self._front
+        self.generation += 1
+
+    def get_cell(self, x, y):
+        return int(self._front[y + 1, x + 1])
+
+    def set_cell(self, x, y, value):
+        self._population += bool(value) - bool(self._front[y + 1, x + 1])
+        self._front[y + 1, x + 1] = value
+
+    def set_cells(self, cells, value=1):
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        # Flat indices into the bordered buffer, without duplicates
+        index = np.unique((cells[:, 1] + 1) * self._front.shape[1] + cells[:, 0] + 1)
+        front = self._front.reshape(-1)
+        before = int(np.count_nonzero(front[index]))
+        front[index] = value
+        self._population += (index.size if value else 0) - before
+
+    def to_array(self):
+        return self.grid
+
+    def load_array(self, array):
+        array = np.asarray(array, dtype=np.uint8)
+        self.height, self.width = array.shape
+        self.reset()
+        self.grid[...] = array
+        self._population = int(np.count_nonzero(self.grid))
+
+    def set_boundary(self, boundary):
+        # Only dead borders are never refilled, so clear them now
+        super().set_boundary(boundary)
+        for buffer in (self._front, self._back):
+            fill_halo(buffer, "dead", self.width, self.height)
+
+
+class ParallelEngine(NumpyEngine):
+    # NumPy engine that splits the board into horizontal stripes, one per
+    # worker, and steps them on a persistent thread pool. Each stripe reads
+    # its rows plus a one-row halo from the shared front buffer and writes
+    # its own rows of the back buffer, so no data is copied between workers;
+    # NumPy releases the GIL inside the kernels, so stripes run concurrently.
+    name = "parallel"
+
+    def __init__(self, width, height, workers=None, rule=CONWAY, boundary=DEFAULT_BOUNDARY):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                        thread_name_prefix="life-stripe")
+        super().__init__(width, height, rule, boundary)
+
+    def reset(self):
+        super().reset()
+        bounds = np.linspace(0, self.height, self.workers + 1).astype(int)
+        self._stripes = [(y0, y1) for y0, y1 in zip(bounds[:-1], bounds[1:]) if y1 > y0]
+
+    def _step_stripe(self, y0, y1):
+        counts = count_neighbors(live_plane(self._front[y0:y1 + 2], self.rule), self._counts[y0:y1])
+        current = self._front[y0 + 1:y1 + 1, 1:-1]
+        if self.rule.is_conway:
+            # B3/S23
+            alive = (counts == 3) | ((counts == 2) & (current == 1))
+        else:
+            alive = self.rule.apply(current, counts)
+        self._back[y0 + 1:y1 + 1, 1:-1] = alive
+        return int(np.count_nonzero(alive))
+
+    def step(self):
+        if self.boundary != "dead":
+            fill_halo(self._front, self.boundary, self.width, self.height)
+        futures = [self._pool.submit(self._step_stripe, y0, y1) for y0, y1 in self._stripes]
+        self._population = sum(future.result() for future in futures)
+        if self.track_changes:
+            self.changed = changed_cells(self._front, self._back, self.width, self.height)
+        self._front, self._back = self._back, self._front
+        self.generation += 1
+
+    def close(self):
+        self._pool.shutdown()
+
+
+class TiledEngine(NumpyEngine):
+    # NumPy engine that tracks changes per TILE_SIZE x TILE_SIZE tile. A tile
+    # is recomputed only if its own cells changed in the previous generation,
+    # or a neighbor tile changed along the shared edge or corner; otherwise
+    # none of its cells or their neighbors moved, so it cannot change now.
+    # Active tiles are gathered into one (n, ts + 2, ts + 2) stack, stepped in
+    # a single vectorized pass and scattered back. active_tiles and
+    # skipped_tiles report the work done by the last step.
+    name = "tiled"
+    tile_size = TILE_SIZE
+
+    def reset(self):
+        ts = self.tile_size
+        self.tiles_x = (self.width + ts - 1) // ts
+        self.tiles_y = (self.height + ts - 1) // ts
+        # The buffer is rounded up to whole tiles; cells past the board edge
+        # are masked off after every step so they stay dead
+        self._front = np.zeros((self.tiles_y * ts + 2, self.tiles_x * ts + 2), dtype=np.uint8)
+        inside = np.zeros((self.tiles_y * ts, self.tiles_x * ts), dtype=np.uint8)
+        inside[:self.height, :self.width] = 0xFF
+        self._inside = inside
+        self._ragged = bool(self.width % ts or self.height % ts)
+        self._counts = np.zeros_like(inside)
+        self._diff = np.zeros_like(inside)
+        # Change flags per tile: whole tile, top, bottom, left and right
+        # edges, then the top-left, top-right, bottom-left and bottom-right
+        # corner cells. Every tile starts dirty.
+        self._flags = np.ones((9, self.tiles_y, self.tiles_x), dtype=bool)
+        # Tiles along the board edge, which wrapping boundaries connect
+        ring = np.zeros((self.tiles_y, self.tiles_x), dtype=bool)
+        ring[[0, -1]] = True
+        ring[:, [0, -1]] = True
+        self._ring = ring
+        self._population = 0
+        self.active_tiles = 0
+        self.skipped_tiles = 0
+
+    @property
+    def grid(self):
+        return self._front[1:self.height + 1, 1:self.width + 1]
+
+    def _tile_view(self, array, size):
+        # (tiles_y, tiles_x, size, size) view with tiles spaced tile_size apart
+        ts = self.tile_size
+        rs, cs = array.strides
+        return np.lib.stride_tricks.as_strided(
+            array, (self.tiles_y, self.tiles_x, size, size), (rs * ts, cs * ts, rs, cs))
+
+    def step(self):
+        ts = self.tile_size
+        # The halo lies inside the buffer when the board is not a whole number
+        # of tiles; those cells are masked back to dead after the step
+        halo = self.boundary != "dead"
+        if halo:
+            fill_halo(self._front, self.boundary, self.width, self.height)
+        changed, top, bottom, left, right, tl, tr, bl, br = self._flags
+        active = changed.copy()
+        active[1:] |= bottom[:-1]
+        active[:-1] |= top[1:]
+        active[:, 1:] |= right[:, :-1]
+        active[:, :-1] |= left[:, 1:]
+        active[1:, 1:] |= br[:-1, :-1]
+        active[1:, :-1] |= bl[:-1, 1:]
+        active[:-1, 1:] |= tr[1:, :-1]
+        active[:-1, :-1] |= tl[1:, 1:]
+        if self.boundary in ("torus", "klein") and (changed & self._ring).any():
+            # Cells on one edge are neighbors of cells on the opposite edge
+            active |= self._ring
+
+        ty, tx = np.nonzero(active)
+        dense = ty.size >= active.size * DENSE_TILE_FRACTION
+        if dense:
+            # Most of the board is active: step it whole, as the NumPy engine does
+            counts = count_neighbors(live_plane(self._front, self.rule), self._counts)
+            current = self._front[1:-1, 1:-1]
+            new = self._next(current, counts)
+            if self._ragged:
+                new &= self._inside
+            diff = np.bitwise_xor(new, current, out=self._diff)
+            if halo and self._ragged:
+                diff &= self._inside
+            flags = self._board_flags(diff)
+            if self.track_changes:
+                self.changed = np.flatnonzero(diff[:self.height, :self.width])
+            current[...] = new
+            self._population = int(np.count_nonzero(new))
+        else:
+            flags = np.zeros_like(self._flags)
+            self.changed = np.zeros(0, dtype=np.intp) if self.track_changes else None
+            if ty.size:
+                # Gather the active tiles with a one-cell halo and step them together
+                blocks = self._tile_view(self._front, ts + 2)[ty, tx]
+                current = blocks[:, 1:-1, 1:-1]
+                # Count over the stack as one flat array, like BatchEngine, so
+                # each add is a single long run rather than n * ts short rows;
+                # flat position i + pitch + 1 is the cell whose neighbors
+                # start at i
+                live = live_plane(blocks, self.rule).reshape(-1)
+                pitch = ts + 2
+                n = live.size - 2 * pitch - 2
+                counts = np.empty(blocks.shape, dtype=np.uint8)
+                flat = counts.reshape(-1)[pitch + 1:pitch + 1 + n]
+                np.copyto(flat, live[:n])
+                for dy, dx in ((0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+                    offset = dy * pitch + dx
+                    np.add(flat, live[offset:offset + n], out=flat)
+                new = self._next(current, counts[:, 1:-1, 1:-1])
+                before = current
+                if self._ragged:
+                    inside = self._tile_view(self._inside, ts)[ty, tx]
+                    new &= inside
+                    if halo:
+                        before = current & inside
+                changes = new != before
+                flags[:, ty, tx] = self._change_flags(changes)
+                if self.track_changes:
+                    # Only the active tiles can change; map their changed
+                    # cells back to the board
+                    k, ys, xs = np.nonzero(changes)
+                    self.changed = np.sort((ty[k] * ts + ys) * self.width + tx[k] * ts + xs)
+                # Only the active tiles can change the population
+                self._population += int(np.count_nonzero(new)) - int(np.count_nonzero(before))
+                # The gathered blocks are copies, so writing back is safe
+                interior = self._tile_view(self._front[1:-1, 1:-1], ts)
+                interior[ty, tx] = new
+
+        self._flags = flags
+        # The dense path steps every tile
+        self.active_tiles = active.size if dense else int(ty.size)
+        self.skipped_tiles = active.size - self.active_tiles
+        self.generation += 1
+
+    def _next(self, current, counts):
+        if self.rule.is_conway:
+            # B3/S23
+            return ((counts == 3) | ((counts == 2) & (current == 1))).view(np.uint8)
+        return self.rule.apply(current, counts)
+
+    def _board_flags(self, diff):
+        # _flags for the whole board from the nonzero cells of diff. The
+        # changed test ORs the rows of each band of tiles together eight
+        # cells to a word. Changed tiles are active next step, so when they
+        # alone make it dense the edges cannot matter and every flag just
+        # copies them; otherwise the edges and corners read only every
+        # tile_size-th row and column.
+        ts, ny, nx = self.tile_size, self.tiles_y, self.tiles_x
+        words = diff.view(np.uint64) if ts % 8 == 0 else diff
+        bands = words.reshape(ny, ts, nx, -1)
+        changed = np.bitwise_or.reduce(bands, axis=1).any(axis=-1)
+        if np.count_nonzero(changed) >= changed.size * DENSE_TILE_FRACTION:
+            return np.repeat(changed[np.newaxis], len(self._flags), axis=0)
+        tiles = diff.reshape(ny, ts, nx, ts)
+        return np.stack((changed, bands[:, 0].any(axis=-1), bands[:, -1].any(axis=-1),
+                         tiles[..., 0].any(axis=1), tiles[..., -1].any(axis=1),
+                         tiles[:, 0, :, 0] != 0, tiles[:, 0, :, -1] != 0,
+                         tiles[:, -1, :, 0] != 0, tiles[:, -1, :, -1] != 0))
+
+    @staticmethod
+    def _change_flags(diff):
+        # Flags in _flags order for tiles of changed cells in the last two axes
+        return np.stack((diff.any(axis=(-2, -1)),
+                         diff[..., 0, :].any(axis=-1), diff[..., -1, :].any(axis=-1),
+                         diff[..., :, 0].any(axis=-1), diff[..., :, -1].any(axis=-1),
+                         diff[..., 0, 0], diff[..., 0, -1], diff[..., -1, 0], diff[..., -1, -1]))
+
+    def set_cell(self, x, y, value):
+        super().set_cell(x, y, value)
+        self._flags[:, y // self.tile_size, x // self.tile_size] = True
+
+    def set_cells(self, cells, value=1):
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        super().set_cells(cells, value)
+        self._flags[:, cells[:, 1] // self.tile_size, cells[:, 0] // self.tile_size] = True
+
+    def set_rule(self, rule):
+        # Tiles that were settled under the old rule may change under the new one
+        super().set_rule(rule)
+        self._flags[...] = True
+
+    def set_boundary(self, boundary):
+        Engine.set_boundary(self, boundary)
+        fill_halo(self._front, "dead", self.width, self.height)
+        self._flags[...] = True
+
+
+class BatchEngine(NumpyEngine):
+    # A stack of boards of the same size in one (boards, height + 2,
+    # width + 2) buffer, all stepped at once. The neighbor counts treat the
+    # whole buffer as one flat array and add it to itself at the eight
+    # neighbor offsets, so each pass is a single long contiguous run however
+    # small the boards are; what this computes in the halos, where
+    # neighboring boards meet, is cleared after the step. Each board has its
+    # own rule and boundary: boards sharing a rule are updated in one pass, as
+    # are the halos of boards sharing a boundary.
+    #
+    # The single-board Engine interface (to_array, set_cell, randomize, rule,
+    # population, ...) acts on board `view`, so a Simulation and the game can
+    # show any board of the batch. The batch-wide readouts are populations(),
+    # to_arrays() and, after track_cycles(), the per-board `periods` and
+    # `settled_at` arrays. The generation count is shared.
+    name = "batch"
+
+    def __init__(self, width, height, boards=BATCH_BOARDS, rule=CONWAY, boundary=DEFAULT_BOUNDARY):
+        # rule and boundary are one for every board or a sequence of one per
+        # board
+        self.boards = boards
+        self.view = 0
+        self.width = width
+        self.height = height
+        self.generation = 0
+        rules = list(rule) if isinstance(rule, (list, tuple)) else [rule] * boards
+        boundaries = list(boundary) if isinstance(boundary, (list, tuple)) else [boundary] * boards
+        if len(rules) != boards or len(boundaries) != boards:
+            raise ValueError(f"Expected one rule and one boundary per board for {boards} boards")
+        self.rules = [self._check_rule(rule) for rule in rules]
+        self.boundaries = [self._check_boundary(boundary) for boundary in boundaries]
+        self.periods = None
+        self.settled_at = None
+        self._allocate()
+
+    @property
+    def rule(self):
+        return self.rules[self.view]
+
+    @property
+    def boundary(self):
+        return self.boundaries[self.view]
+
+    def _boards(self, boards):
+        # Board indices for an index, a sequence or a slice; None is the
+        # viewed board
+        return np.arange(self.boards)[self.view if boards is None else boards].reshape(-1)
+
+    def _allocate(self):
+        shape = (self.boards, self.height + 2, self.width + 2)
+        self._front = np.zeros(shape, dtype=np.uint8)
+        self._back = np.zeros_like(self._front)
+        self._counts = np.zeros(self._front.size, dtype=np.uint8)
+        self._populations = np.zeros(self.boards, dtype=np.int64)
+        if self.periods is not None:
+            self.track_cycles(len(self._hash_generations))
+
+    def reset(self, boards=None):
+        self._front[self._boards(boards)] = 0
+        self._edited(boards)
+
+    def set_rule(self, rule, boards=None):
+        # Switch the rule of the given boards (the viewed one by default);
+        # states the new rule does not have become dead
+        rule = self._check_rule(rule)
+        for board in self._boards(boards).tolist():
+            if rule.states < self.rules[board].states:
+                grid = self._front[board, 1:-1, 1:-1]
+                grid[grid >= rule.states] = 0
+            self.rules[board] = rule
+        self._edited(boards)
+
+    def set_boundary(self, boundary, boards=None):
+        boundary = self._check_boundary(boundary)
+        index = self._boards(boards)
+        for board in index.tolist():
+            self.boundaries[board] = boundary
+        # Only dead borders are never refilled, so clear them now
+        for buffer in (self._front, self._back):
+            fill_halo(buffer, "dead", self.width, self.height, index)
+        self._edited(boards)
+
+    def _groups(self, values):
+        # {value: board indices} for a per-board list, or None if every board
+        # has the same value
+        groups = {}
+        for board, value in enumerate(values):
+            groups.setdefault(value, []).append(board)
+        return None if len(groups) == 1 else {value: np.array(index) for value, index in groups.items()}
+
+    def step(self):
+        w, h = self.width, self.height
+        front = self._front
+        boundaries = self._groups(self.boundaries)
+        if boundaries is None:
+            if self.boundaries[0] != "dead":
+                fill_halo(front, self.boundaries[0], w, h)
+        else:
+            for boundary, index in boundaries.items():
+                if boundary != "dead":
+                    fill_halo(front, boundary, w, h, index)
+
+        # Two-state boards only hold 0 and 1, so state 1 is the live plane of
+        # every board
+        two_state = all(rule.states == 2 for rule in self.rules)
+        live = (front if two_state else (front == 1).view(np.uint8)).reshape(-1)
+        # Flat position i + pitch + 1 is the cell whose neighbors start at i
+        pitch = w + 2
+        n = live.size - 2 * pitch - 2
+        counts = self._counts[pitch + 1:pitch + 1 + n]
+        np.copyto(counts, live[:n])
+        for dy, dx in ((0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            offset = dy * pitch + dx
+            np.add(counts, live[offset:offset + n], out=counts)
+
+        rules = self._groups(self.rules)
+        if rules is None:
+            rule = self.rules[0]
+            grid = front.reshape(-1)[pitch + 1:pitch + 1 + n]
+            back = self._back.reshape(-1)[pitch + 1:pitch + 1 + n]
+            if rule.is_conway:
+                # B3/S23
+                back[...] = (counts == 3) | ((counts == 2) & (grid == 1))
+            else:
+                back[...] = rule.apply(grid, counts)
+        else:
+            counts = self._counts.reshape(front.shape)
+            for rule, index in rules.items():
+                self._back[index] = rule.apply(front[index], counts[index])
+        fill_halo(self._back, "dead", w, h)
+        boards = self._back.reshape(self.boards, -1)
+        if two_state:
+            # Summing along an axis is several times faster than
+            # count_nonzero along it
+            self._populations = boards.sum(axis=1, dtype=np.uint32).astype(np.int64)
+        else:
+            self._populations = np.fromiter(map(np.count_nonzero, boards), np.int64, self.boards)
+        if self.track_changes:
+            view = self.view
+            self.changed = changed_cells(front[view], self._back[view], w, h)
+        self._front, self._back = self._back, self._front
+        self.generation += 1
+        if self.periods is not None:
+            self._update_cycles()
+
+    def jump(self, generations):
+        # Boards with other rules and boundaries share the generation, so the
+        # whole batch is stepped
+        for _ in range(generations):
+            self.step()
+
+    # Board `view`
+
+    @property
+    def grid(self):
+        return self._front[self.view, 1:-1, 1:-1]
+
+    def get_cell(self, x, y):
+        return int(self._front[self.view, y + 1, x + 1])
+
+    def set_cell(self, x, y, value):
+        self._front[self.view, y + 1, x + 1] = value
+        self._edited()
+
+    def set_cells(self, cells, value=1):
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        self.grid[cells[:, 1], cells[:, 0]] = value
+        self._edited()
+
+    def load_array(self, array):
+        # The boards share one size, so a board of another size is centered
+        # on the viewed board and cropped to it; the other boards are left
+        # alone
+        array = np.asarray(array, dtype=np.uint8)
+        if array.shape != (self.height, self.width):
+            array = shift_board(array, self.width, self.height, (self.width - array.shape[1]) // 2,
+                                (self.height - array.shape[0]) // 2)
+        self.grid[...] = array
+        self._edited()
+
+    def randomize(self, rng=None, density=DENSITY, region=None, boards=None):
+        # A random_soup board for each of the given boards (the viewed one by
+        # default), drawn one after the other from rng
+        if rng is None:
+            rng = np.random.default_rng()
+        for board in self._boards(boards).tolist():
+            self._front[board, 1:-1, 1:-1] = random_soup(self.width, self.height, density, rng, region)
+        self._edited(boards)
+
+    def population(self):
+        return int(self._populations[self.view])
+
+    def resize(self, width, height, x_offset=0, y_offset=0):
+        old = self.to_arrays().copy()
+        self.width, self.height = width, height
+        self._allocate()
+        src_x, src_y = max(0, -x_offset), max(0, -y_offset)
+        dst_x, dst_y = max(0, x_offset), max(0, y_offset)
+        copy_w = min(old.shape[2] - src_x, width - dst_x)
+        copy_h = min(old.shape[1] - src_y, height - dst_y)
+        if copy_w > 0 and copy_h > 0:
+            self._front[:, 1 + dst_y:1 + dst_y + copy_h, 1 + dst_x:1 + dst_x + copy_w] = \
+                old[:, src_y:src_y + copy_h, src_x:src_x + copy_w]
+        self._edited(slice(None))
+
+    # Whole batch
+
+    def to_arrays(self):
+        # (boards, height, width) view of every board; read-only
+        return self._front[:, 1:-1, 1:-1]
+
+    def load_arrays(self, arrays):
+        arrays = np.asarray(arrays, dtype=np.uint8)
+        if arrays.shape != (self.boards, self.height, self.width):
+            raise ValueError(f"Expected {self.boards} boards of {self.width}x{self.height}, "
+                             f"got an array of shape {arrays.shape}")
+        self.to_arrays()[...] = arrays
+        self._edited(slice(None))
+
+    def populations(self):
+        return self._populations.copy()
+
+    def _edited(self, boards=None):
+        index = self._boards(boards)
+        grid = self._front[index, 1:-1, 1:-1]
+        self._populations[index] = np.count_nonzero(grid.reshape(index.size, -1), axis=1)
+        if self.periods is not None:
+            # Earlier hashes of these boards no longer predict anything
+            self._since[index] = self.generation
+            self.periods[index] = 0
+            self.settled_at[index] = -1
+            self._update_cycles(record_only=True)
+
+    # Stabilization
+
+    def track_cycles(self, history=HISTORY):
+        # Hash every board after each step and look the hash up among the
+        # board's last `history` hashes. periods[i] is then the period of
+        # board i once it repeats (1 for a still life, 0 until then) and
+        # settled_at[i] the generation at which it was seen to repeat, or -1.
+        self.periods = np.zeros(self.boards, dtype=np.int64)
+        self.settled_at = np.full(self.boards, -1, dtype=np.int64)
+        self._hashes = np.zeros((history, self.boards), dtype=np.uint64)
+        self._hash_generations = np.full(history, -1, dtype=np.int64)
+        self._since = np.full(self.boards, self.generation, dtype=np.int64)
+        self._keys = None
+        self._update_cycles(record_only=True)
+
+    def _board_hashes(self):
+        # One 64-bit hash per board: the boards' bits (every bit plane of the
+        # states in use) packed into words, times random keys, summed
+        grid = self.to_arrays().reshape(self.boards, -1)
+        states = max(rule.states for rule in self.rules)
+        planes = [grid] if states == 2 else [(grid >> bit) & 1 for bit in range(int(states - 1).bit_length())]
+        packed = np.concatenate([np.packbits(plane, axis=1, bitorder="little") for plane in planes], axis=1)
+        padding = -packed.shape[1] % 8
+        if padding:
+            packed = np.pad(packed, ((0, 0), (0, padding)))
+        words = packed.view("<u8")
+        if self._keys is None or self._keys.size != words.shape[1]:
+            rng = np.random.default_rng(ZOBRIST_SEED)
+            self._keys = rng.integers(0, 2 ** 64, size=words.shape[1], dtype=np.uint64)
+        return (words * self._keys).sum(axis=1, dtype=np.uint64)
+
+    def _update_cycles(self, record_only=False):
+        hashes = self._board_hashes()
+        generations = self._hash_generations
+        if not record_only:
+            # Rows recorded since each board's last edit that hold its hash
+            match = (self._hashes == hashes) & (generations[:, None] >= self._since)
+            seen = np.where(match, generations[:, None], -1).max(axis=0)
+            found = (seen >= 0) & (self.periods == 0)
+            self.periods[found] = self.generation - seen[found]
+            self.settled_at[found] = self.generation
+        row = self.generation % len(generations)
+        self._hashes[row] = hashes
+        generations[row] = self.generation
+
+
+class BitPackedEngine(Engine):
+    # Stores 64 cells per uint64 word, bit x % 64 of word x // 64 holding cell
+    # x. Neighbor planes are built with word shifts and summed with bitwise
+    # adders, so each word operation updates 64 cells at once. Rows above and
+    # below the board are kept as zero words.
+    name = "bitpacked"
+
+    def reset(self):
+        self.words_per_row = (self.width + 63) // 64
+        self._rows = np.zeros((self.height + 2, self.words_per_row), dtype=np.uint64)
+        # Mask for the unused high bits of the last word in each row
+        tail_bits = self.width - (self.words_per_row - 1) * 64
+        self._tail_bits = np.uint64(tail_bits)
+        self._tail_mask = np.uint64((1 << tail_bits) - 1)
+        self._population = 0
+
+    def randomize(self, rng=None, density=DENSITY, region=None):
+        if density != DENSITY or region is not None:
+            super().randomize(rng, density, region)
+            return
+        if rng is None:
+            rng = np.random.default_rng()
+        # Same byte stream as random_soup, packed straight into words
+        data = np.zeros((self.height, self.words_per_row * 8), dtype=np.uint8)
+        data[:, :(self.width + 7) // 8] = rng.integers(
+            0, 256, (self.height, (self.width + 7) // 8), dtype=np.uint8)
+        self._rows[1:-1] = data.view("<u8").astype(np.uint64)
+        self._rows[1:-1, -1] &= self._tail_mask
+        self._population = self._count_bits()
+
+    def step(self):
+        rows = self._rows
+        one, top = np.uint64(1), np.uint64(63)
+        if self.boundary != "dead":
+            self._fill_halo_rows()
+
+        # Plane of west neighbors (cell x - 1 moved to x) and of east neighbors
+        west = rows << one
+        west[:, 1:] |= rows[:, :-1] >> top
+        east = rows >> one
+        east[:, :-1] |= rows[:, 1:] << top
+        if self.boundary != "dead":
+            # Cells past the left and right edges, for every row including the
+            # halo rows so the corners are right
+            if self.boundary == "alive":
+                left = right = np.uint64(1)
+            else:
+                left = (rows[:, -1] >> (self._tail_bits - one)) & one
+                right = rows[:, 0] & one
+            west[:, 0] |= left
+            east[:, -1] |= right << (self._tail_bits - one)
+
+        neighbors = (west[:-2], rows[:-2], east[:-2],
+                     west[1:-1], east[1:-1],
+                     west[2:], rows[2:], east[2:])
+
+        # Three-bit ripple counter per cell; a count of 8 wraps to 0, which
+        # B3/S23 treats the same as any other count above 3. Other rules get
+        # a fourth bit, set only for a count of 8.
+        conway = self.rule.is_conway
+        s0 = np.zeros_like(rows[1:-1])
+        s1 = np.zeros_like(s0)
+        s2 = np.zeros_like(s0)
+        s3 = None if conway else np.zeros_like(s0)
+        for plane in neighbors:
+            carry = s0 & plane
+            s0 ^= plane
+            carry2 = s1 & carry
+            s1 ^= carry
+            if s3 is not None:
+                s3 |= s2 & carry2
+            s2 ^= carry2
+
+        alive = rows[1:-1]
+        if conway:
+            # B3/S23: count is 2 or 3 (s1 set, s2 clear), and either the cell
+            # is alive or the count is odd
+            rows[1:-1] = s1 & ~s2 & (s0 | alive)
+        else:
+            bits = (s0, s1, s2, s3)
+            born = self._count_mask(bits, self.rule.birth)
+            survive = self._count_mask(bits, self.rule.survival)
+            rows[1:-1] = (born & ~alive) | (survive & alive)
+        rows[1:-1, -1] &= self._tail_mask
+        self._population = self._count_bits()
+        self.generation += 1
+
+    def _fill_halo_rows(self):
+        # Rows above and below the board, as fill_halo does for padded buffers
+        rows = self._rows
+        if self.boundary == "alive":
+            rows[[0, -1]] = ~np.uint64(0)
+            rows[[0, -1], -1] &= self._tail_mask
+        elif self.boundary == "torus":
+            rows[0] = rows[-2]
+            rows[-1] = rows[1]
+        else:
+            rows[0] = self._mirror(rows[-2])
+            rows[-1] = self._mirror(rows[1])
+
+    def _mirror(self, row):
+        # Row with its cells in reverse order
+        bits = np.unpackbits(row.astype("<u8").view(np.uint8), bitorder="little")
+        mirrored = np.zeros_like(bits)
+        mirrored[:self.width] = bits[self.width - 1::-1]
+        return np.packbits(mirrored, bitorder="little").view("<u8").astype(np.uint64)
+
+    def set_boundary(self, boundary):
+        super().set_boundary(boundary)
+        self._rows[[0, -1]] = 0
+
+    @staticmethod
+    def _count_mask(bits, counts):
+        # Bits of the cells whose neighbor count, given as bit planes, is in counts
+        result = np.zeros_like(bits[0])
+        for count in counts:
+            mask = ~np.zeros_like(bits[0])
+            for i, plane in enumerate(bits):
+                mask &= plane if count >> i & 1 else ~plane
+            result |= mask
+        return result
+
+    def get_cell(self, x, y):
+        return int((self._rows[y + 1, x >> 6] >> np.uint64(x & 63)) & np.uint64(1))
+
+    def set_cell(self, x, y, value):
+        self._population += bool(value) - self.get_cell(x, y)
+        bit = np.uint64(1) << np.uint64(x & 63)
+        if value:
+            self._rows[y + 1, x >> 6] |= bit
+        else:
+            self._rows[y + 1, x >> 6] &= ~bit
+
+    def set_cells(self, cells, value=1):
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        index = (cells[:, 1] + 1, cells[:, 0] >> 6)
+        bits = np.left_shift(np.uint64(1), (cells[:, 0] & 63).astype(np.uint64))
+        if value:
+            np.bitwise_or.at(self._rows, index, bits)
+        else:
+            np.bitwise_and.at(self._rows, index, ~bits)
+        self._population = self._count_bits()
+
+    def to_array(self):
+        data = self._rows[1:-1].astype("<u8").view(np.uint8)
+        return np.unpackbits(data, axis=1, bitorder="little")[:, :self.width]
+
+    def window(self, x0, y0, x1, y1):
+        # Only the words holding the window are unpacked
+        if x1 <= x0 or y1 <= y0:
+            return np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=np.uint8)
+        first = x0 // 64
+        words = self._rows[1 + y0:1 + y1, first:(x1 + 63) // 64]
+        data = np.ascontiguousarray(words).astype("<u8").view(np.uint8).reshape(y1 - y0, -1)
+        cells = np.unpackbits(data, axis=1, bitorder="little")
+        return cells[:, x0 - first * 64:x1 - first * 64]
+
+    def load_array(self, array):
+        array = np.asarray(array, dtype=np.uint8)
+        self.height, self.width = array.shape
+        self.reset()
+        padded = np.zeros((self.height, self.words_per_row * 64), dtype=np.uint8)
+        padded[:, :self.width] = array != 0
+        packed = np.packbits(padded, axis=1, bitorder="little")
+        self._rows[1:-1] = packed.view("<u8").astype(np.uint64)
+        self._population = self._count_bits()
+
+    def _count_bits(self):
+        # Board rows only; the halo rows may hold wrapped cells
+        rows = self._rows[1:-1]
+        if hasattr(np, "bitwise_count"):
+            return int(np.bitwise_count(rows).sum())
+        return int(np.unpackbits(rows.view(np.uint8)).sum())
+
+
+class HashLifeEngine(Engine):
+    # Memoized quadtree engine on the unbounded plane; the board is a window
+    # onto the universe, so patterns keep evolving past its edges
+    name = "hashlife"
+    bounded = False
+
+    def reset(self):
+        self.universe = HashLife(rule=self.rule)
+
+    def set_rule(self, rule):
+        # Memoized results only hold for one rule, so start a new universe
+        self.rule = self._check_rule(rule)
+        cells = self.universe.live_cells()
+        self.universe = HashLife(rule=self.rule)
+        self.universe.set_cells(cells)
+
+    def step(self):
+        self.universe.step(1)
+        self.generation += 1
+
+    def jump(self, generations):
+        self.universe.step(generations)
+        self.generation += generations
+
+    def get_cell(self, x, y):
+        return int(self.universe.to_array(x, y, 1, 1)[0, 0])
+
+    def set_cell(self, x, y, value):
+        self.set_cells([(x, y)], value)
+
+    def set_cells(self, cells, value=1):
+        self.universe.edit_cells(map(tuple, np.asarray(cells).reshape(-1, 2).tolist()), value)
+
+    def to_array(self):
+        return self.universe.to_array(0, 0, self.width, self.height)
+
+    def window(self, x0, y0, x1, y1):
+        return self.universe.to_array(x0, y0, x1 - x0, y1 - y0)
+
+    def load_array(self, array):
+        array = np.asarray(array, dtype=np.uint8)
+        self.height, self.width = array.shape
+        self.universe.load_array(array)
+
+    def population(self):
+        return self.universe.population
+
+    def resize(self, width, height, x_offset=0, y_offset=0):
+        # Only the window changes; the universe is shifted instead of copied
+        self.width, self.height = width, height
+        self.universe.origin_x += x_offset
+        self.universe.origin_y += y_offset
+
+
+class SparseEngine(Engine):
+    # Keeps only the live cells, as a set of world coordinates on the unbounded
+    # plane. A step touches live cells and their neighbors, so its cost follows
+    # the population rather than the board area. The board is a window whose
+    # top-left corner sits at (origin_x, origin_y) in world coordinates.
+    name = "sparse"
+    bounded = False
+
+    def reset(self):
+        self.cells = set()
+        self.origin_x = 0
+        self.origin_y = 0
+
+    def step(self):
+        cells = self.cells
+        counts = Counter((x + dx, y + dy) for x, y in cells for dx, dy in NEIGHBOR_OFFSETS)
+        if self.rule.is_conway:
+            # B3/S23
+            self.cells = {cell for cell, count in counts.items()
+                          if count == 3 or (count == 2 and cell in cells)}
+        else:
+            birth, survival = self.rule.birth, self.rule.survival
+            new = {cell for cell, count in counts.items()
+                   if count in (survival if cell in cells else birth)}
+            if 0 in survival:
+                # Live cells without live neighbors are not counted at all
+                new.update(cell for cell in cells if cell not in counts)
+            self.cells = new
+        self.generation += 1
+
+    def jump(self, generations):
+        # Both planes are unbounded, so a HashLife universe holding every
+        # live cell gives exactly the stepped result
+        universe = HashLife(rule=self.rule)
+        universe.set_cells(self.cells)
+        universe.step(generations)
+        self.cells = set(universe.live_cells())
+        self.generation += generations
+
+    def get_cell(self, x, y):
+        return int((x + self.origin_x, y + self.origin_y) in self.cells)
+
+    def set_cell(self, x, y, value):
+        cell = (x + self.origin_x, y + self.origin_y)
+        if value:
+            self.cells.add(cell)
+        else:
+            self.cells.discard(cell)
+
+    def set_cells(self, cells, value=1):
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2) + (self.origin_x, self.origin_y)
+        cells = map(tuple, cells.tolist())
+        if value:
+            self.cells.update(cells)
+        else:
+            self.cells.difference_update(cells)
+
+    def to_array(self):
+        return self.window(0, 0, self.width, self.height)
+
+    def window(self, x0, y0, x1, y1):
+        array = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        x0 += self.origin_x
+        y0 += self.origin_y
+        x1 += self.origin_x
+        y1 += self.origin_y
+        cells = [(x - x0, y - y0) for x, y in self.cells if x0 <= x < x1 and y0 <= y < y1]
+        if cells:
+            xs, ys = zip(*cells)
+            array[list(ys), list(xs)] = 1
+        return array
+
+    def load_array(self, array):
+        array = np.asarray(array)
+        self.height, self.width = array.shape
+        ys, xs = np.nonzero(array)
+        self.cells = set(zip((xs + self.origin_x).tolist(), (ys + self.origin_y).tolist()))
+
+    def population(self):
+        return len(self.cells)
+
+    def resize(self, width, height, x_offset=0, y_offset=0):
+        # Only the window changes; it is moved so the cells keep their place
+        self.width, self.height = width, height
+        self.origin_x -= x_offset
+        self.origin_y -= y_offset
+
+
+# Available stepping engines, selectable by name
+ENGINES = {
+    "numpy": NumpyEngine,
+    "tiled": TiledEngine,
+    "parallel": ParallelEngine,
+    "bitpacked": BitPackedEngine,
+    "hashlife": HashLifeEngine,
+    "sparse": SparseEngine,
+    "batch": BatchEngine,
+    "list": ListEngine,
+}
+
+DEFAULT_ENGINE = "numpy"
+
+
+def create_engine(name, width, height, **options):
+    # Extra options go to the engine, e.g. the rule, or workers for the
+    # parallel engine
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine '{name}', expected one of: {', '.join(ENGINES)}")
+    return ENGINES[name](width, height, **options)
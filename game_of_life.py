@@ -1,17 +1,36 @@
-import pygame
+import argparse
+import cProfile
+import math
 import sys
-import random
+import time
+from collections import Counter
+
+import pygame
+
+from camera import Camera
+from cycles import ACTIONS as CYCLE_ACTIONS, HISTORY as CYCLE_HISTORY
+from engines import BATCH_BOARDS, BOUNDARIES, DEFAULT_BOUNDARY, DEFAULT_ENGINE, DENSITY, ENGINES
+from profiler import DUMP_INTERVAL, Profiler
+from recorder import KEYFRAME_INTERVAL
+from renderers import DEFAULT_RENDERER, RENDERERS
+from rules import CONWAY, RULES, parse_rule
+from simulation import LIBRARY, PATTERNS, Simulation, SimulationThread
+from tasks import TaskRunner
 
 # Constants
 WIDTH, HEIGHT = 1000, 600
 CONTROL_PANEL_WIDTH = 200  # Fixed control panel width
 CELL_SIZE = 10  # Initial cell size
-MIN_CELL_SIZE = 5  # Minimum cell size
+MIN_CELL_SIZE = 1  # Minimum cell size
 MAX_CELL_SIZE = 20  # Maximum cell size
 GAME_PANEL_WIDTH = WIDTH - CONTROL_PANEL_WIDTH
 GRID_WIDTH = GAME_PANEL_WIDTH // CELL_SIZE
 GRID_HEIGHT = HEIGHT // CELL_SIZE
 SPEED = 10
+# Target generations per second selectable with the arrow keys; None is as fast as possible
+SPEED_LEVELS = [1, 2, 5, 10, 20, 30, 60, 120, 250, 500, 1000, 2000, 5000, None]
+RENDER_FPS = 60  # Frame rate of the display, independent of the simulation speed
+JUMP_GENERATIONS = 1 << 10  # Generations skipped by the jump action
 
 # Colors and Themes
 THEMES = {
@@ -89,50 +108,45 @@ THEMES = {
     }
 }
 
-# Patterns
-PATTERNS = {
-    "glider": [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)],
-    "blinker": [(1, 0), (1, 1), (1, 2)],
-    "block": [(0, 0), (0, 1), (1, 0), (1, 1)],
-    "beacon": [(0, 0), (1, 0), (0, 1), (3, 2), (2, 3), (3, 3)],
-    "toad": [(1, 1), (2, 1), (3, 1), (0, 2), (1, 2), (2, 2)],
-    "pulsar": [(2,0), (3,0), (4,0), (8,0), (9,0), (10,0),
-              (0,2), (5,2), (7,2), (12,2),
-              (0,3), (5,3), (7,3), (12,3),
-              (0,4), (5,4), (7,4), (12,4),
-              (2,5), (3,5), (4,5), (8,5), (9,5), (10,5),
-              (2,7), (3,7), (4,7), (8,7), (9,7), (10,7),
-              (0,8), (5,8), (7,8), (12,8),
-              (0,9), (5,9), (7,9), (12,9),
-              (0,10), (5,10), (7,10), (12,10),
-              (2,12), (3,12), (4,12), (8,12), (9,12), (10,12)]
-}
-
 class GameOfLife:
-    def __init__(self):
+    def __init__(self, engine=DEFAULT_ENGINE, seed=None, renderer=DEFAULT_RENDERER, rule=CONWAY,
+                 boundary=DEFAULT_BOUNDARY, profiler=None, size=None, **options):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
         pygame.display.set_caption("Conway's Game of Life")
         self.clock = pygame.time.Clock()
-        self.running = False
-        self.speed = SPEED
+        self.renderer = RENDERERS[renderer]()
         self.current_theme = "classic"
         self.show_grid = True
-        self.cell_size = CELL_SIZE
         self.zoom_speed = 1  # New: Control zoom sensitivity
         self.min_zoom_speed = 1
         self.max_zoom_speed = 3
-        
-        # Mouse position tracking for centered zooming
-        self.last_mouse_pos = (0, 0)
-        
-        # Calculate initial grid dimensions
+
+        # The world defaults to the size that fills the window; the camera
+        # maps it to the game panel, so zooming, panning and resizing the
+        # window never touch it
         self.game_panel_width = WIDTH - CONTROL_PANEL_WIDTH
-        self.grid_width = self.game_panel_width // self.cell_size
-        self.grid_height = HEIGHT // self.cell_size
-        
-        # Initialize empty grid
-        self.reset_grid()
+        width, height = size or (self.game_panel_width // CELL_SIZE, HEIGHT // CELL_SIZE)
+        self.camera = Camera(CELL_SIZE, MIN_CELL_SIZE, MAX_CELL_SIZE)
+        self.camera.center(width, height, self.game_panel_width, HEIGHT)
+        self.panning = False
+
+        # Simulation core owns the cell state and is stepped on its own thread
+        self.simulation = Simulation(width, height, engine, seed, rule, boundary, **options)
+        # Frame phase timings; only collected while the overlay is shown or
+        # metrics are being written
+        self.profiler = profiler or Profiler()
+        self.show_profile = self.profiler.enabled
+        self.stepper = SimulationThread(self.simulation, SPEED, self.profiler)
+        # Saving, loading, random boards and patterns run on a worker thread
+        self.tasks = TaskRunner(self.simulation)
+
+        # Cells painted by dragging with the left button since the last
+        # frame, applied together once per frame, the value they are set to
+        # (None while not painting) and the last cell painted
+        self.paint_cells = []
+        self.paint_value = None
+        self.paint_last = None
         
         # Better fonts
         try:
@@ -158,40 +172,97 @@ class GameOfLife:
         
         # Store theme button positions for click detection
         self.theme_buttons = []
+        self.rule_button = None
+
+        # Pattern file last stamped with P, as an index into the library
+        self.library_index = -1
+
+        # Cached control panel and rendered stat labels
+        self.panel_surface = None
+        self.panel_key = None
+        self.text_cache = {}
+
+    @property
+    def engine(self):
+        return self.simulation.engine
+
+    @property
+    def cell_size(self):
+        return self.camera.scale
+
+    @property
+    def running(self):
+        return self.stepper.running
+
+    @running.setter
+    def running(self, value):
+        self.stepper.running = value
+
+    @property
+    def speed(self):
+        return self.stepper.target_rate
+
+    @speed.setter
+    def speed(self, value):
+        self.stepper.target_rate = value
+
+    def change_speed(self, delta):
+        # Move through SPEED_LEVELS, the last of which is unlimited
+        idx = SPEED_LEVELS.index(self.speed) if self.speed in SPEED_LEVELS else 0
+        self.speed = SPEED_LEVELS[max(0, min(len(SPEED_LEVELS) - 1, idx + delta))]
 
     def run(self):
+        # The simulation runs on its own thread; this loop only renders the
+        # latest generation at RENDER_FPS
+        self.stepper.start()
+        profiler = self.profiler
         while True:
-            self.handle_events()
-            if self.running:
-                self.update_grid()
-            self.draw_grid()
-            pygame.display.flip()
-            self.clock.tick(self.speed)
+            with profiler.phase("frame"):
+                with profiler.phase("events"):
+                    self.handle_events()
+                with profiler.phase("render"):
+                    self.draw_grid()
+                with profiler.phase("panel"):
+                    self.draw_control_panel()
+                with profiler.phase("flip"):
+                    pygame.display.flip()
+            profiler.poll()
+            self.clock.tick(RENDER_FPS)
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                self.stepper.stop()
+                self.tasks.shutdown()
+                self.simulation.close()
                 pygame.quit()
                 sys.exit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button in (4, 5):  # Mouse wheel up (4) or down (5)
-                    # Store mouse position for centered zooming
                     mouse_x, mouse_y = pygame.mouse.get_pos()
                     if mouse_x < self.game_panel_width:  # Only zoom when mouse is over game panel
-                        self.last_mouse_pos = (mouse_x, mouse_y)
-                        zoom_amount = self.zoom_speed
-                        if event.button == 4:  # Wheel up - zoom in
-                            self.change_cell_size(self.cell_size + zoom_amount)
-                        else:  # Wheel down - zoom out
-                            self.change_cell_size(self.cell_size - zoom_amount)
+                        # Zoom around the cell under the mouse
+                        zoom_amount = self.zoom_speed if event.button == 4 else -self.zoom_speed
+                        self.camera.zoom(self.cell_size + zoom_amount, mouse_x, mouse_y)
+                elif event.button in (2, 3):  # Middle or right button drags the view
+                    self.panning = True
                 else:
-                    x, y = pygame.mouse.get_pos()
+                    x, y = event.pos
                     if x < self.game_panel_width:  # Game panel clicks
-                        grid_x, grid_y = x // self.cell_size, y // self.cell_size
-                        if 0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_height:
-                            self.grid[grid_y][grid_x] = 1 - self.grid[grid_y][grid_x]
+                        self.start_painting(*self.camera.to_world(x, y))
                     else:  # Control panel clicks
                         self.handle_control_panel_click(x - self.game_panel_width, y)
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button in (2, 3):
+                    self.panning = False
+                elif event.button == 1:
+                    self.apply_painting()
+                    self.paint_value = None
+            elif event.type == pygame.MOUSEMOTION:
+                if self.panning:
+                    self.camera.pan(*event.rel)
+                if self.paint_value is not None:
+                    self.paint_to(*self.camera.to_world(*event.pos))
             elif event.type == pygame.VIDEORESIZE:
                 self.resize_grid(event.w, event.h)
             elif event.type == pygame.KEYDOWN:
@@ -201,6 +272,10 @@ class GameOfLife:
                     self.reset_grid()
                 elif event.key == pygame.K_d:
                     self.randomize_grid()
+                elif event.key == pygame.K_j:
+                    self.jump_generations(JUMP_GENERATIONS)
+                elif event.key == pygame.K_HOME:
+                    self.center_view()
                 elif event.key == pygame.K_g:
                     self.show_grid = not self.show_grid
                 elif event.key == pygame.K_t:
@@ -208,9 +283,9 @@ class GameOfLife:
                     current_idx = themes.index(self.current_theme)
                     self.current_theme = themes[(current_idx + 1) % len(themes)]
                 elif event.key == pygame.K_UP:
-                    self.speed = min(60, self.speed + 1)
+                    self.change_speed(1)
                 elif event.key == pygame.K_DOWN:
-                    self.speed = max(1, self.speed - 1)
+                    self.change_speed(-1)
                 elif event.key == pygame.K_s:
                     self.save_grid()
                 elif event.key == pygame.K_l:
@@ -219,13 +294,59 @@ class GameOfLife:
                     self.zoom_speed = min(self.max_zoom_speed, self.zoom_speed + 1)
                 elif event.key == pygame.K_MINUS:
                     self.zoom_speed = max(self.min_zoom_speed, self.zoom_speed - 1)
+                elif event.key == pygame.K_b:
+                    self.next_boundary()
+                elif event.key == pygame.K_u:
+                    self.next_rule()
+                elif event.key == pygame.K_c:
+                    self.cycle_detection_mode()
+                elif event.key == pygame.K_p:
+                    self.stamp_library_pattern()
+                elif event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                    self.next_board(1 if event.key == pygame.K_RIGHTBRACKET else -1)
+                elif event.key == pygame.K_F3:
+                    self.toggle_profile_overlay()
+                elif event.key == pygame.K_F4:
+                    self.profiler.toggle_capture()
                 elif event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6]:
                     patterns = list(PATTERNS.keys())
                     idx = event.key - pygame.K_1
                     if idx < len(patterns):
-                        self.load_pattern(patterns[idx])
+                        if event.mod & pygame.KMOD_SHIFT:
+                            self.stamp_pattern(patterns[idx])
+                        else:
+                            self.load_pattern(patterns[idx])
+        self.apply_painting()
+
+    def start_painting(self, x, y):
+        # A click toggles the cell under the mouse, and dragging on sets the
+        # cells passed over to the same state
+        if self.engine.bounded and not (0 <= x < self.simulation.width and 0 <= y < self.simulation.height):
+            return
+        with self.simulation.lock:
+            self.paint_value = 0 if self.engine.get_cell(x, y) else 1
+        self.paint_cells.append((x, y))
+        self.paint_last = (x, y)
+
+    def paint_to(self, x, y):
+        # Every cell on the line from the last painted cell, so fast drags
+        # leave no gaps
+        last_x, last_y = self.paint_last
+        steps = max(abs(x - last_x), abs(y - last_y))
+        for i in range(1, steps + 1):
+            self.paint_cells.append((last_x + round((x - last_x) * i / steps),
+                                     last_y + round((y - last_y) * i / steps)))
+        self.paint_last = (x, y)
+
+    def apply_painting(self):
+        if self.paint_cells:
+            self.simulation.paint(self.paint_cells, self.paint_value)
+            self.paint_cells = []
 
     def handle_control_panel_click(self, rel_x, rel_y):
+        if self.rule_button and self.rule_button[0] <= rel_y <= self.rule_button[1]:
+            self.next_rule()
+            return
         # Check if click is within any theme button
         for theme_name, (button_x, button_y, button_width, button_height) in self.theme_buttons:
             # Convert relative x,y to actual coordinates
@@ -235,11 +356,9 @@ class GameOfLife:
                 break
 
     def resize_grid(self, width, height):
-        # Store current grid state
-        old_grid = [row[:] for row in self.grid]
-        old_width = self.grid_width
-        old_height = self.grid_height
-        
+        # Only the view changes; the world keeps its size and cells
+        old_width, old_height = self.game_panel_width, self.screen.get_height()
+
         # Ensure minimum window size
         width = max(width, CONTROL_PANEL_WIDTH + 200)
         height = max(height, 300)
@@ -247,136 +366,123 @@ class GameOfLife:
         # Update window dimensions
         self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
         
-        # Calculate new game panel width and height
+        # Calculate new game panel width and keep the view centered
         self.game_panel_width = width - CONTROL_PANEL_WIDTH
-        
-        # Calculate new grid dimensions
-        self.grid_width = self.game_panel_width // self.cell_size
-        self.grid_height = height // self.cell_size
-        
-        # Create new empty grid
-        self.grid = [[0] * self.grid_width for _ in range(self.grid_height)]
-        
-        # Calculate centering offsets
-        x_offset = max(0, (self.grid_width - old_width) // 2)
-        y_offset = max(0, (self.grid_height - old_height) // 2)
-        
-        # Copy old pattern to center of new grid
-        for y in range(min(old_height, self.grid_height)):
-            for x in range(min(old_width, self.grid_width)):
-                try:
-                    new_x = x + x_offset
-                    new_y = y + y_offset
-                    if 0 <= new_x < self.grid_width and 0 <= new_y < self.grid_height:
-                        self.grid[new_y][new_x] = old_grid[y][x]
-                except IndexError:
-                    continue
+        self.camera.resize(old_width, old_height, self.game_panel_width, height)
+
+    def follow_view(self):
+        # The unbounded engines have no world edge. Their window onto the
+        # plane is moved to cover the view, which is cheap for them, so
+        # panning reaches every cell and saving, random boards and patterns
+        # act on what is shown.
+        if self.engine.bounded:
+            return
+        camera = self.camera
+        x0, y0 = math.floor(camera.x), math.floor(camera.y)
+        width = math.ceil(camera.x + self.game_panel_width / camera.scale) - x0
+        height = math.ceil(camera.y + self.screen.get_height() / camera.scale) - y0
+        if (x0, y0, width, height) != (0, 0, self.simulation.width, self.simulation.height):
+            self.simulation.resize(width, height, -x0, -y0)
+            camera.x -= x0
+            camera.y -= y0
+
+    def center_view(self):
+        self.camera.center(self.simulation.width, self.simulation.height,
+                           self.game_panel_width, self.screen.get_height())
 
     def save_grid(self):
-        with open("saved_grid.txt", "w") as f:
-            for row in self.grid:
-                f.write(" ".join(map(str, row)) + "\n")
+        self.tasks.save()
 
     def load_grid(self):
-        try:
-            with open("saved_grid.txt", "r") as f:
-                self.grid = [list(map(int, line.split())) for line in f]
-        except FileNotFoundError:
-            pass
+        self.tasks.load()
 
     def load_pattern(self, pattern_name):
-        if pattern_name in PATTERNS:
-            # Calculate center position
-            center_x = self.grid_width // 2
-            center_y = self.grid_height // 2
-            
-            # Find pattern dimensions
-            pattern = PATTERNS[pattern_name]
-            min_x = min(x for x, _ in pattern)
-            max_x = max(x for x, _ in pattern)
-            min_y = min(y for _, y in pattern)
-            max_y = max(y for _, y in pattern)
-            pattern_width = max_x - min_x + 1
-            pattern_height = max_y - min_y + 1
-            
-            # Calculate offset to center pattern
-            offset_x = center_x - pattern_width // 2
-            offset_y = center_y - pattern_height // 2
-            
-            self.reset_grid()
-            for dx, dy in pattern:
-                new_x = dx - min_x + offset_x
-                new_y = dy - min_y + offset_y
-                if 0 <= new_x < self.grid_width and 0 <= new_y < self.grid_height:
-                    self.grid[new_y][new_x] = 1
+        self.tasks.load_pattern(pattern_name)
+
+    def next_board(self, step):
+        # Batch engines hold several boards; show the previous or next one
+        if hasattr(self.engine, "boards"):
+            self.simulation.view_board(self.engine.view + step)
+
+    def next_rule(self):
+        # Next preset rule the engine can run, starting over after the last
+        names = [name for name, text in RULES.items() if self.engine.supports(text)]
+        current = self.simulation.rule.name
+        index = names.index(current) + 1 if current in names else 0
+        self.simulation.set_rule(RULES[names[index % len(names)]])
+
+    def next_boundary(self):
+        modes = [mode for mode in BOUNDARIES if self.engine.supports_boundary(mode)]
+        index = modes.index(self.simulation.boundary) + 1
+        self.simulation.set_boundary(modes[index % len(modes)])
+
+    def cycle_detection_mode(self):
+        # Off, then each action in turn
+        modes = [None] + CYCLE_ACTIONS
+        mode = modes[(modes.index(self.simulation.on_cycle) + 1) % len(modes)]
+        self.simulation.detect_cycles(mode)
+
+    def stamp_pattern(self, pattern_name):
+        # Add the pattern at the mouse without clearing the board, or in the
+        # center when the mouse is over the control panel
+        x, y = pygame.mouse.get_pos()
+        if x < self.game_panel_width:
+            self.tasks.place_pattern(pattern_name, *self.camera.to_world(x, y))
+        else:
+            self.tasks.place_pattern(pattern_name)
+
+    def stamp_library_pattern(self):
+        # Cycle through the pattern files and stamp the next one
+        names = LIBRARY.names()
+        if names:
+            self.library_index = (self.library_index + 1) % len(names)
+            self.stamp_pattern(names[self.library_index])
 
     def update_grid(self):
-        new_grid = [[0 for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                alive_neighbors = self.count_alive_neighbors(x, y)
-                if self.grid[y][x] == 1:
-                    if alive_neighbors < 2 or alive_neighbors > 3:
-                        new_grid[y][x] = 0
-                    else:
-                        new_grid[y][x] = 1
-                else:
-                    if alive_neighbors == 3:
-                        new_grid[y][x] = 1
-        self.grid = new_grid
-
-    def count_alive_neighbors(self, x, y):
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        count = 0
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.grid_width and 0 <= ny < self.grid_height:
-                count += self.grid[ny][nx]
-        return count
+        self.simulation.step()
+
+    def jump_generations(self, generations):
+        self.simulation.jump(generations)
 
     def draw_grid(self):
         theme = THEMES[self.current_theme]
-        # Draw game panel background
-        pygame.draw.rect(self.screen, theme["dead"], (0, 0, self.game_panel_width, self.screen.get_height()))
-        
-        # Draw cells - Fixed to use actual grid dimensions instead of visible area
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                if self.grid[y][x] == 1:
-                    rect = (x * self.cell_size, y * self.cell_size, 
-                           self.cell_size - 1, self.cell_size - 1)
-                    # Only draw if cell is in visible area
-                    if (0 <= rect[0] <= self.game_panel_width and 
-                        0 <= rect[1] <= self.screen.get_height()):
-                        pygame.draw.rect(self.screen, theme["alive"], rect)
-                        if self.cell_size > 4:  # Only add glow effect for larger cells
-                            pygame.draw.rect(self.screen, theme["alive"], rect, 1)
-
-        # Draw grid lines
-        if self.show_grid and self.cell_size > 3:
-            for x in range(0, self.game_panel_width + self.cell_size, self.cell_size):
-                pygame.draw.line(self.screen, theme["grid"], 
-                               (x, 0), (x, self.screen.get_height()))
-            for y in range(0, self.screen.get_height() + self.cell_size, self.cell_size):
-                pygame.draw.line(self.screen, theme["grid"], 
-                               (0, y), (self.game_panel_width, y))
-
-        # Draw control panel
-        self.draw_control_panel()
+        height = self.screen.get_height()
+        self.follow_view()
+        # Copy the visible part of the latest finished generation so the
+        # simulation can keep stepping
+        with self.simulation.lock:
+            (x0, y0, x1, y1), origin = self.camera.visible(self.simulation.width, self.simulation.height,
+                                                           self.game_panel_width, height)
+            cells = self.engine.window(x0, y0, x1, y1)
+            states = self.simulation.rule.states
+        self.renderer.draw(self.screen, cells, self.cell_size, theme, self.show_grid,
+                           self.game_panel_width, height, states, origin)
 
     def draw_control_panel(self):
         theme = THEMES[self.current_theme]
+        window_height = self.screen.get_height()
+
+        # The panel only changes with these; otherwise reuse the cached surface
+        key = (self.current_theme, window_height, self.speed, self.cell_size, self.running,
+               self.simulation.on_cycle, self.simulation.rule, self.simulation.boundary)
+        if key != self.panel_key:
+            self.panel_surface = self.render_control_panel(theme, window_height)
+            self.panel_key = key
+        self.screen.blit(self.panel_surface, (self.game_panel_width, 0))
+
+        self.draw_stats(theme, window_height)
+        if self.show_profile:
+            self.draw_profile(theme, window_height)
+
+    def render_control_panel(self, theme, window_height):
         # Draw control panel background
-        panel_rect = pygame.Rect(self.game_panel_width, 0, CONTROL_PANEL_WIDTH, self.screen.get_height())
-        pygame.draw.rect(self.screen, theme["panel"], panel_rect)
+        panel = pygame.Surface((CONTROL_PANEL_WIDTH, window_height))
+        panel.fill(theme["panel"])
         
         # Draw separator line
-        pygame.draw.line(self.screen, theme["grid"],
-                        (self.game_panel_width, 0),
-                        (self.game_panel_width, self.screen.get_height()), 2)
+        pygame.draw.line(panel, theme["grid"], (0, 0), (0, window_height), 2)
 
         padding = 10
-        window_height = self.screen.get_height()
         
         # Calculate available space and spacing
         content_height = window_height - 2 * padding
@@ -387,15 +493,15 @@ class GameOfLife:
         
         # Title with adjusted space
         title = self.title_font.render("Game of Life", True, theme["text"])
-        x_pos = self.game_panel_width + (CONTROL_PANEL_WIDTH - title.get_width()) // 2
-        self.screen.blit(title, (x_pos, y_offset))
+        x_pos = (CONTROL_PANEL_WIDTH - title.get_width()) // 2
+        panel.blit(title, (x_pos, y_offset))
         y_offset += section_spacing  # Reduced space after title
 
         # Game Status with adjusted space
         status_text = f"{self.symbols['play'] if not self.running else self.symbols['pause']}  "
         status_text += "RUNNING" if self.running else "PAUSED"
         status = self.font.render(status_text, True, theme["text"])
-        self.screen.blit(status, (self.game_panel_width + padding + 5, y_offset))
+        panel.blit(status, (padding + 5, y_offset))
         y_offset += section_spacing * 0.8  # Reduced space after status
 
         # Controls Sections
@@ -404,12 +510,18 @@ class GameOfLife:
                 ("SPACE", "Play/Pause"),
                 ("R", "Reset"),
                 ("D", "Random"),
+                ("J", f"Jump {JUMP_GENERATIONS}"),
+                ("C", f"Cycles ({self.simulation.on_cycle or 'off'})"),
+                ("U", f"Rule ({self.simulation.rule.name.replace('_', ' ').title()})"),
+                ("B", f"Edges ({self.simulation.boundary})"),
                 ("S", "Save"),
                 ("L", "Load")
             ]),
             ("View Options", [
                 (f"Zoom ({self.cell_size})", "Mouse Wheel"),
-                (f"Speed ({self.speed})", "↑/↓ Keys"),
+                ("Pan", "Right Drag"),
+                ("Home", "Center"),
+                (f"Speed ({self.speed or 'max'})", "↑/↓ Keys"),
                 ("Grid", "G Toggle"),
                 ("Theme", "T Cycle")
             ]),
@@ -419,7 +531,9 @@ class GameOfLife:
                 ("3", "Block"),
                 ("4", "Beacon"),
                 ("5", "Toad"),
-                ("6", "Pulsar")
+                ("6", "Pulsar"),
+                ("Shift+1-6", "Stamp"),
+                ("P", "Stamp File")
             ])
         ]
 
@@ -442,19 +556,22 @@ class GameOfLife:
         for section_name, items in sections:
             # Section header without background
             header = self.font.render(section_name, True, theme["alive"])
-            self.screen.blit(header, (self.game_panel_width + padding + 5, y_offset))
+            panel.blit(header, (padding + 5, y_offset))
             y_offset += item_spacing
 
             # Section items with adjusted spacing
             for key, action in items:
                 text = self.small_font.render(f"{key}: {action}", True, theme["text"])
-                self.screen.blit(text, (self.game_panel_width + padding + 12, y_offset))  # Slightly reduced indentation
+                panel.blit(text, (padding + 12, y_offset))  # Slightly reduced indentation
+                if key == "U":
+                    # The rule line is also clickable
+                    self.rule_button = (y_offset, y_offset + item_spacing)
                 y_offset += item_spacing  # Reduced spacing between items
             y_offset += section_spacing * 0.6  # Reduced space between sections
 
         # Theme Selection
         theme_header = self.font.render("Themes", True, theme["alive"])
-        self.screen.blit(theme_header, (self.game_panel_width + padding + 5, y_offset))
+        panel.blit(theme_header, (padding + 5, y_offset))
         y_offset += item_spacing
 
         # Reset theme buttons list
@@ -469,93 +586,271 @@ class GameOfLife:
                 (padding, y_offset, button_width, button_height)
             ))
 
-            # Draw button (no background or border)
-            button_rect = pygame.Rect(self.game_panel_width + padding, y_offset,
-                                    button_width, button_height)
-            
-            # Theme name (removed border drawing)
+            # Theme name as button text (no background or border)
             text = f"{'● ' if theme_name == self.current_theme else '  '}{theme_name.title()}"
             surface = self.small_font.render(text, True, theme["text"])
-            self.screen.blit(surface, (self.game_panel_width + padding + 5, y_offset + 2))
+            panel.blit(surface, (padding + 5, y_offset + 2))
             
             y_offset += button_height + 2
 
-        # Stats and credit with adjusted spacing
+        # Credit with adjusted space
+        credit = self.small_font.render("Made by hyu", True, theme["text"])
+        credit_x = (CONTROL_PANEL_WIDTH - credit.get_width()) // 2
+        panel.blit(credit, (credit_x, window_height - padding - 20))  # Reduced space from bottom
+
+        return panel
+
+    def draw_stats(self, theme, window_height):
+        # Stats with adjusted spacing
+        padding = 10
         bottom_section_height = 60  # Reduced height
         stats_y = window_height - bottom_section_height
         
-        # Stats without background
-        cells = sum(sum(row) for row in self.grid)
-        stats = self.font.render(f"Active Cells: {cells}", True, theme["alive"])  # Changed to theme["alive"] for better visibility
+        # Stats without background; labels are only re-rendered when they change
+        with self.simulation.lock:
+            cells = self.engine.population()
+            generation = self.simulation.generation
+            cycle = self.simulation.cycles.cycle if self.simulation.cycles else None
+            board = (self.engine.view, self.engine.boards) if hasattr(self.engine, "boards") else None
+        stats = self.render_text(self.font, f"Active Cells: {cells}", theme["alive"])  # Changed to theme["alive"] for better visibility
         stats_x = self.game_panel_width + padding + 5
         self.screen.blit(stats, (stats_x, stats_y))
-
-        # Credit with adjusted space
-        credit = self.small_font.render("Made by hyu", True, theme["text"])
-        credit_x = self.game_panel_width + (CONTROL_PANEL_WIDTH - credit.get_width()) // 2
-        self.screen.blit(credit, (credit_x, window_height - padding - 20))  # Reduced space from bottom
+        rate = self.render_text(self.small_font, f"Gen {generation} ({self.stepper.rate:.0f} gen/s)", theme["text"])
+        self.screen.blit(rate, (stats_x, stats_y - 20))
+        if board:
+            text = self.render_text(self.small_font, f"Board {board[0] + 1}/{board[1]}", theme["text"])
+            self.screen.blit(text, (stats_x + CONTROL_PANEL_WIDTH - 30 - text.get_width(), stats_y - 20))
+        if cycle:
+            text = f"{cycle.kind.capitalize()}, period {cycle.period} at gen {cycle.generation}"
+            self.screen.blit(self.render_text(self.small_font, text, theme["text"]), (stats_x, stats_y - 40))
+        # Background task status, over the credit line
+        status = self.tasks.status()
+        if status:
+            status_y = window_height - padding - 20
+            pygame.draw.rect(self.screen, theme["panel"],
+                             (self.game_panel_width + 2, status_y, CONTROL_PANEL_WIDTH - 2, 20))
+            self.screen.blit(self.small_font.render(status, True, theme["text"]), (stats_x, status_y))
+
+    def draw_profile(self, theme, window_height):
+        # Rolling percentiles per phase, above the stats
+        summary = self.profiler.cached_summary()
+        lines = ["ms      p50    p95    p99"]
+        lines += [f"{phase:<7}{s['p50']:>6.2f} {s['p95']:>6.2f} {s['p99']:>6.2f}" for phase, s in summary.items()]
+        if self.profiler.capturing:
+            lines.append("cProfile capturing (F4)")
+        line_height = 16
+        top = window_height - 60 - 40 - line_height * len(lines)
+        x = self.game_panel_width + 15
+        pygame.draw.rect(self.screen, theme["panel"],
+                         (self.game_panel_width + 2, top - 4, CONTROL_PANEL_WIDTH - 2, line_height * len(lines) + 8))
+        for i, text in enumerate(lines):
+            self.screen.blit(self.render_text(self.small_font, text, theme["text"]), (x, top + i * line_height))
+
+    def toggle_profile_overlay(self):
+        # Timing runs while the overlay is shown, and always while metrics
+        # are being written
+        self.show_profile = not self.show_profile
+        self.profiler.enabled = self.show_profile or self.profiler.metrics_path is not None
+        if self.show_profile:
+            self.profiler.reset()
+
+    def render_text(self, font, text, color):
+        key = (font, text, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            # Counters change constantly, so drop stale labels wholesale
+            if len(self.text_cache) > 64:
+                self.text_cache.clear()
+            surface = font.render(text, True, color)
+            self.text_cache[key] = surface
+        return surface
 
     def reset_grid(self):
         # Initialize completely empty grid
-        self.grid = [[0] * self.grid_width for _ in range(self.grid_height)]
+        self.simulation.reset()
 
     def randomize_grid(self):
-        self.grid = [[random.choice([0, 1]) for _ in range(self.grid_width)] for _ in range(self.grid_height)]
-
-    def change_cell_size(self, new_size):
-        # Constrain cell size
-        new_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, new_size))
-        if new_size != self.cell_size:
-            # Store current grid and dimensions
-            old_grid = [row[:] for row in self.grid]
-            old_width = self.grid_width
-            old_height = self.grid_height
-            old_cell_size = self.cell_size
-            
-            # Get mouse position for zoom center
-            mouse_x, mouse_y = self.last_mouse_pos
-            
-            # Calculate relative position of mouse in grid
-            rel_x = mouse_x / (old_width * old_cell_size)
-            rel_y = mouse_y / (old_height * old_cell_size)
-            
-            # Update cell size and recalculate grid dimensions
-            self.cell_size = new_size
-            self.grid_width = self.game_panel_width // self.cell_size
-            self.grid_height = self.screen.get_height() // self.cell_size
-            
-            # Create new grid
-            self.grid = [[0] * self.grid_width for _ in range(self.grid_height)]
-            
-            # Calculate scaling factors
-            scale_x = self.grid_width / old_width
-            scale_y = self.grid_height / old_height
-            
-            # Calculate offsets to maintain zoom center
-            offset_x = int((rel_x * self.grid_width) - (rel_x * old_width))
-            offset_y = int((rel_y * self.grid_height) - (rel_y * old_height))
-            
-            # Copy all cells with proper scaling and centering
-            for old_y in range(old_height):
-                for old_x in range(old_width):
-                    if old_grid[old_y][old_x] == 1:
-                        # Calculate new position with scaling and offset
-                        new_x = int(old_x * scale_x) - offset_x
-                        new_y = int(old_y * scale_y) - offset_y
-                        
-                        # Ensure new position is within bounds
-                        if 0 <= new_x < self.grid_width and 0 <= new_y < self.grid_height:
-                            self.grid[new_y][new_x] = 1
-                            
-                            # For smoother scaling, fill adjacent cells when zooming in
-                            if scale_x > 1 and scale_y > 1:
-                                for dy in range(2):
-                                    for dx in range(2):
-                                        nx, ny = new_x + dx, new_y + dy
-                                        if (nx < self.grid_width and 
-                                            ny < self.grid_height):
-                                            self.grid[ny][nx] = 1
+        self.tasks.randomize()
+
+
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{value}'")
+    if width < 1 or height < 1:
+        raise argparse.ArgumentTypeError(f"size must be positive, got '{value}'")
+    return width, height
+
+
+def parse_position(value):
+    try:
+        x, y = (int(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected X,Y, got '{value}'")
+    return x, y
+
+
+def parse_rule_arg(value):
+    try:
+        return parse_rule(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Conway's Game of Life")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window at full speed and exit")
+    parser.add_argument("--generations", type=int, default=1000,
+                        help="generations to run in headless mode (default: 1000)")
+    parser.add_argument("--size", type=parse_size, default=(GRID_WIDTH, GRID_HEIGHT),
+                        help="board size as WIDTHxHEIGHT (default: the size that fills the window)")
+    parser.add_argument("--seed", type=int, help="seed for randomized boards")
+    parser.add_argument("--density", type=float, default=DENSITY,
+                        help=f"share of live cells in randomized boards (default: {DENSITY})")
+    parser.add_argument("--pattern", metavar="NAME|FILE",
+                        help="start from a built-in pattern, a pattern from the patterns "
+                             "directory or an RLE/Life 1.06/plaintext file instead of a random board")
+    parser.add_argument("--at", type=parse_position, metavar="X,Y",
+                        help="top-left corner of --pattern (default: centered)")
+    parser.add_argument("--load", metavar="FILE",
+                        help="start from a saved board or a recording instead of a random one")
+    parser.add_argument("--seek", type=int, metavar="GENERATION",
+                        help="generation to start from when --load is a recording (default: the last)")
+    parser.add_argument("--on-cycle", choices=CYCLE_ACTIONS,
+                        help="detect the board repeating and report it, stop, or reseed with a random board")
+    parser.add_argument("--cycle-history", type=int, default=CYCLE_HISTORY,
+                        help=f"longest period detected (default: {CYCLE_HISTORY})")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record every generation to FILE as keyframes and deltas")
+    parser.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL,
+                        help=f"generations between keyframes in a recording (default: {KEYFRAME_INTERVAL})")
+    parser.add_argument("--engine", choices=list(ENGINES), default=DEFAULT_ENGINE,
+                        help=f"stepping engine (default: {DEFAULT_ENGINE})")
+    parser.add_argument("--boards", type=int,
+                        help=f"boards stepped together by the batch engine; [ and ] switch the board "
+                             f"shown (default: {BATCH_BOARDS})")
+    parser.add_argument("--workers", type=int,
+                        help="threads stepping the parallel engine (default: one per CPU)")
+    parser.add_argument("--rule", type=parse_rule_arg, default=parse_rule(CONWAY),
+                        help=f"rule as B/S notation such as B36/S23, a Generations rule such as "
+                             f"B2/S/C3, or one of: {', '.join(RULES)} (default: {CONWAY})")
+    parser.add_argument("--boundary", choices=BOUNDARIES, default=DEFAULT_BOUNDARY,
+                        help="cells beyond the board edge: dead, alive, wrapped (torus) or wrapped "
+                             f"with rows mirrored (klein) (default: {DEFAULT_BOUNDARY})")
+    parser.add_argument("--renderer", choices=list(RENDERERS), default=DEFAULT_RENDERER,
+                        help=f"board renderer (default: {DEFAULT_RENDERER})")
+    parser.add_argument("--profile", nargs="?", const=True, metavar="FILE",
+                        help="show the frame timing overlay; in headless mode, write a cProfile "
+                             "capture of the run to FILE (default: profile.prof)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="append frame timing percentiles to FILE as CSV (.csv) or JSON lines")
+    parser.add_argument("--metrics-interval", type=float, default=DUMP_INTERVAL,
+                        help=f"seconds between --metrics writes (default: {DUMP_INTERVAL:g})")
+    parser.add_argument("--out", help="file to write the final board to (plain text if it ends in .txt, "
+                                      "a pattern file for .rle, .lif, .life or .cells)")
+    args = parser.parse_args(argv)
+    if not 0 <= args.density <= 1:
+        parser.error(f"density must be between 0 and 1, got {args.density}")
+    if args.boards is not None and args.engine != "batch":
+        parser.error("--boards needs --engine batch")
+    if args.boards is not None and args.boards < 1:
+        parser.error(f"--boards must be positive, got {args.boards}")
+    if args.workers is not None and args.engine != "parallel":
+        parser.error("--workers needs --engine parallel")
+    if args.workers is not None and args.workers < 1:
+        parser.error(f"--workers must be positive, got {args.workers}")
+    if not ENGINES[args.engine].supports(args.rule):
+        parser.error(f"the {args.engine} engine does not support the rule {args.rule.string}")
+    if not ENGINES[args.engine].supports_boundary(args.boundary):
+        parser.error(f"the {args.engine} engine does not support the {args.boundary} boundary")
+    return args
+
+
+def engine_options(args):
+    # Options only some engines take, passed on when given
+    options = {"boards": args.boards, "workers": args.workers}
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def run_headless(args):
+    width, height = args.size
+    simulation = Simulation(width, height, args.engine, args.seed, args.rule, args.boundary,
+                            **engine_options(args))
+    simulation.density = args.density
+    batch = args.engine == "batch"
+    if batch:
+        simulation.engine.track_cycles(args.cycle_history)
+    if batch and not (args.load or args.pattern):
+        # Every board of the batch starts from its own soup
+        simulation.engine.randomize(simulation.rng, args.density, boards=slice(None))
+    elif args.load:
+        simulation.load(args.load, args.seek)
+    elif args.pattern:
+        x, y = args.at or (None, None)
+        simulation.place_pattern(args.pattern, x, y, reset=True)
+    else:
+        simulation.randomize()
+
+    if args.on_cycle:
+        simulation.detect_cycles(args.on_cycle, args.cycle_history)
+
+    recorder = simulation.start_recording(args.record, args.keyframe_interval) if args.record else None
+    profile = cProfile.Profile() if args.profile else None
+    start = time.perf_counter()
+    if profile:
+        profile.enable()
+    generations = simulation.step(args.generations)
+    if profile:
+        profile.disable()
+    elapsed = time.perf_counter() - start
+    if recorder:
+        simulation.stop_recording(recorder)
+
+    rate = generations / elapsed if elapsed > 0 else float("inf")
+    print(f"{generations} generations of {width}x{height} under {simulation.rule.string} in {elapsed:.3f}s "
+          f"({rate:.1f} gen/s), population {simulation.engine.population()}")
+    if args.on_cycle == "reseed":
+        print(f"{simulation.cycles_found} boards settled and were reseeded")
+    elif simulation.cycles and simulation.cycles.cycle:
+        cycle = simulation.cycles.cycle
+        print(f"{cycle.kind.capitalize()}, period {cycle.period}, detected at generation {cycle.generation}")
+    if batch:
+        engine = simulation.engine
+        populations = engine.populations()
+        settled = engine.periods > 0
+        print(f"{engine.boards} boards: population mean {populations.mean():.1f}, "
+              f"min {populations.min()}, max {populations.max()}; {settled.sum()} settled")
+        if settled.any():
+            periods = sorted(Counter(engine.periods[settled].tolist()).items())
+            print("  boards by period: " + ", ".join(f"{p}: {c}" for p, c in periods))
+    if profile:
+        path = args.profile if isinstance(args.profile, str) else "profile.prof"
+        profile.dump_stats(path)
+        print(f"Profile written to {path}")
+    if args.out:
+        simulation.save(args.out)
+    simulation.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.headless:
+        run_headless(args)
+    else:
+        profiler = Profiler(bool(args.profile), args.metrics, args.metrics_interval)
+        game = GameOfLife(args.engine, args.seed, args.renderer, args.rule, args.boundary, profiler, args.size,
+                          **engine_options(args))
+        game.simulation.density = args.density
+        if args.record:
+            recorder = game.simulation.start_recording(args.record, args.keyframe_interval)
+        try:
+            game.run()
+        finally:
+            if args.record:
+                game.simulation.stop_recording(recorder)
+
 
 if __name__ == '__main__':
-    game = GameOfLife()
-    game.run()
+    main()
@@ -0,0 +1,280 @@
+import numpy as np
+
+from rules import CONWAY, parse_rule
+
+
+class Node:
+    # Canonical quadtree node. A node of level k covers a 2^k x 2^k square;
+    # level 0 nodes are single cells. Nodes are interned by HashLife.join, so
+    # equal subtrees are the same object and can be compared by identity.
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.population = population
+
+
+DEAD = Node(0, None, None, None, None, 0)
+ALIVE = Node(0, None, None, None, None, 1)
+
+# Default upper bound on interned nodes before the cache is collected
+MAX_NODES = 2_000_000
+
+
+class HashLife:
+    # Memoized quadtree universe on the unbounded plane. The root covers the
+    # square starting at (origin_x, origin_y); step() advances any number of
+    # generations, taking 2^k generations at a time through the memoized
+    # successor function. Any two-state rule without birth on 0 neighbors
+    # can be used.
+
+    def __init__(self, max_nodes=MAX_NODES, rule=CONWAY):
+        self.max_nodes = max_nodes
+        self.rule = parse_rule(rule)
+        if self.rule.states != 2 or 0 in self.rule.birth:
+            raise ValueError(f"HashLife cannot run the rule {self.rule.string}")
+        self._neighborhood = self.rule.neighborhood.tolist()
+        self._nodes = {}
+        self._results = {}
+        self._empty = [DEAD]
+        self.generation = 0
+        self.origin_x = 0
+        self.origin_y = 0
+        self.root = self.empty(3)
+
+    # Node construction
+
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw.level + 1, nw, ne, sw, se, population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def expand(self, node):
+        # Same pattern centered in a node one level up
+        e = self.empty(node.level - 1)
+        return self.join(self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+                         self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+
+    def center(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    # Conversion
+
+    def set_cells(self, cells):
+        # Replace the universe with the given (x, y) live cells
+        cells = list(cells)
+        self.origin_x = min((x for x, _ in cells), default=0)
+        self.origin_y = min((y for _, y in cells), default=0)
+        extent = max([x - self.origin_x + 1 for x, _ in cells] +
+                     [y - self.origin_y + 1 for _, y in cells] + [8])
+        level = max(3, (extent - 1).bit_length())
+        points = [(x - self.origin_x, y - self.origin_y) for x, y in cells]
+        self.root = self._build(points, level, 0, 0)
+
+    def _build(self, points, level, x0, y0):
+        if not points:
+            return self.empty(level)
+        if level == 0:
+            return ALIVE
+        half = 1 << (level - 1)
+        quads = ([], [], [], [])
+        for x, y in points:
+            quads[(x >= x0 + half) + 2 * (y >= y0 + half)].append((x, y))
+        return self.join(self._build(quads[0], level - 1, x0, y0),
+                         self._build(quads[1], level - 1, x0 + half, y0),
+                         self._build(quads[2], level - 1, x0, y0 + half),
+                         self._build(quads[3], level - 1, x0 + half, y0 + half))
+
+    def edit_cells(self, cells, value=1):
+        # Set the given (x, y) cells alive or dead in place, rebuilding only
+        # the nodes on their paths from the root
+        points = list(cells)
+        if value:
+            # Grow the root until it covers every cell
+            x0 = min((x for x, _ in points), default=self.origin_x)
+            y0 = min((y for _, y in points), default=self.origin_y)
+            x1 = max((x for x, _ in points), default=self.origin_x)
+            y1 = max((y for _, y in points), default=self.origin_y)
+            while (x0 < self.origin_x or y0 < self.origin_y or
+                   x1 >= self.origin_x + (1 << self.root.level) or
+                   y1 >= self.origin_y + (1 << self.root.level)):
+                self.root = self.expand(self.root)
+                offset = 1 << (self.root.level - 2)
+                self.origin_x -= offset
+                self.origin_y -= offset
+        size = 1 << self.root.level
+        points = [(x - self.origin_x, y - self.origin_y) for x, y in points]
+        points = [(x, y) for x, y in points if 0 <= x < size and 0 <= y < size]
+        if points:
+            self.root = self._edit(self.root, points, 0, 0, ALIVE if value else DEAD)
+
+    def _edit(self, node, points, x0, y0, leaf):
+        if node.level == 0:
+            return leaf
+        if leaf is DEAD and node.population == 0:
+            return node
+        half = 1 << (node.level - 1)
+        quads = ([], [], [], [])
+        for x, y in points:
+            quads[(x >= x0 + half) + 2 * (y >= y0 + half)].append((x, y))
+        children = (node.nw, node.ne, node.sw, node.se)
+        corners = ((x0, y0), (x0 + half, y0), (x0, y0 + half), (x0 + half, y0 + half))
+        return self.join(*(self._edit(child, quad, cx, cy, leaf) if quad else child
+                           for child, quad, (cx, cy) in zip(children, quads, corners)))
+
+    def load_array(self, array, x=0, y=0):
+        ys, xs = np.nonzero(array)
+        self.set_cells(zip((xs + x).tolist(), (ys + y).tolist()))
+
+    def live_cells(self):
+        cells = []
+        self._collect(self.root, self.origin_x, self.origin_y, cells)
+        return cells
+
+    def _collect(self, node, x, y, cells, window=None):
+        if node.population == 0:
+            return
+        size = 1 << node.level
+        if window is not None:
+            x0, y0, x1, y1 = window
+            if x >= x1 or y >= y1 or x + size <= x0 or y + size <= y0:
+                return
+        if node.level == 0:
+            cells.append((x, y))
+            return
+        half = size >> 1
+        self._collect(node.nw, x, y, cells, window)
+        self._collect(node.ne, x + half, y, cells, window)
+        self._collect(node.sw, x, y + half, cells, window)
+        self._collect(node.se, x + half, y + half, cells, window)
+
+    def to_array(self, x, y, width, height):
+        # Dense view of the window with top-left corner (x, y)
+        array = np.zeros((height, width), dtype=np.uint8)
+        cells = []
+        self._collect(self.root, self.origin_x, self.origin_y, cells,
+                      (x, y, x + width, y + height))
+        if cells:
+            xs, ys = zip(*cells)
+            array[np.array(ys) - y, np.array(xs) - x] = 1
+        return array
+
+    @property
+    def population(self):
+        return self.root.population
+
+    # Evolution
+
+    def step(self, generations=1):
+        # Advance by decomposing the count into powers of two
+        j = 0
+        while generations:
+            if generations & 1:
+                self._advance(j)
+            generations >>= 1
+            j += 1
+        if len(self._nodes) > self.max_nodes:
+            self.collect()
+
+    def _advance(self, j):
+        # Grow the root until the pattern sits in its central half with room
+        # for 2^j generations of growth, then take a single successor step
+        root = self.root
+        while root.level < j + 2 or self.center(root).population != root.population:
+            root = self.expand(root)
+            offset = 1 << (root.level - 2)
+            self.origin_x -= offset
+            self.origin_y -= offset
+        root = self.expand(root)
+        offset = 1 << (root.level - 2)
+        self.origin_x -= offset
+        self.origin_y -= offset
+        self.root = self.successor(root, j)
+        self.origin_x += offset
+        self.origin_y += offset
+        self.generation += 1 << j
+
+    def successor(self, node, j):
+        # Central half of the node advanced by 2^j generations (j <= level - 2)
+        if node.population == 0:
+            return node.nw
+        j = min(j, node.level - 2)
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            result = self._base_case(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            join = self.join
+            c1 = self.successor(nw, j)
+            c2 = self.successor(join(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(join(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(join(nw.se, ne.sw, sw.ne, se.nw), j)
+            c6 = self.successor(join(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(join(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+            if j < node.level - 2:
+                # The sub-results already cover 2^j generations; stitch their centers
+                result = join(join(c1.se, c2.sw, c4.ne, c5.nw), join(c2.se, c3.sw, c5.ne, c6.nw),
+                              join(c4.se, c5.sw, c7.ne, c8.nw), join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                # Two half-steps of 2^(j-1) generations each
+                result = join(self.successor(join(c1, c2, c4, c5), j),
+                              self.successor(join(c2, c3, c5, c6), j),
+                              self.successor(join(c4, c5, c7, c8), j),
+                              self.successor(join(c5, c6, c8, c9), j))
+        self._results[key] = result
+        return result
+
+    def _base_case(self, node):
+        # One generation of the central 2x2 of a 4x4 node
+        cells = [[0] * 4 for _ in range(4)]
+        for qy, row in enumerate(((node.nw, node.ne), (node.sw, node.se))):
+            for qx, quad in enumerate(row):
+                for cy, cx, leaf in ((0, 0, quad.nw), (0, 1, quad.ne), (1, 0, quad.sw), (1, 1, quad.se)):
+                    cells[qy * 2 + cy][qx * 2 + cx] = leaf.population
+
+        def next_state(x, y):
+            # 3x3 neighborhood as bits, looked up in the rule's table
+            index = 0
+            for dy in range(3):
+                for dx in range(3):
+                    index |= cells[y + dy - 1][x + dx - 1] << (dy * 3 + dx)
+            return ALIVE if self._neighborhood[index] else DEAD
+
+        return self.join(next_state(1, 1), next_state(2, 1), next_state(1, 2), next_state(2, 2))
+
+    # Cache management
+
+    def collect(self):
+        # Drop memoized results and every node not reachable from the root
+        self._results = {}
+        self._nodes = {}
+        seen = set()
+        stack = [self.root] + self._empty[1:]
+        while stack:
+            node = stack.pop()
+            if node.level == 0 or id(node) in seen:
+                continue
+            seen.add(id(node))
+            self._nodes[(node.nw, node.ne, node.sw, node.se)] = node
+            stack.extend((node.nw, node.ne, node.sw, node.se))
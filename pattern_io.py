@@ -0,0 +1,278 @@
+import os
+import re
+
+import numpy as np
+
+# Bytes read at a time from pattern files; huge patterns are never held as
+# one string
+CHUNK_SIZE = 1 << 16
+
+# RLE lines are wrapped at this width when writing
+RLE_LINE_WIDTH = 70
+
+FORMATS = {
+    ".rle": "rle",
+    ".lif": "life106",
+    ".life": "life106",
+    ".cells": "plaintext",
+}
+
+_RLE_TOKEN = re.compile(r"(\d*)([A-Za-z.$!])")
+_RLE_HEADER = re.compile(r"\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?")
+_PLAINTEXT_RUN = re.compile(r"[O*]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def detect_format(path):
+    # By extension, falling back to the first line of the file
+    ext = os.path.splitext(path)[1].lower()
+    if ext in FORMATS:
+        return FORMATS[ext]
+    with open(path, "r") as f:
+        first = f.readline()
+    if first.startswith("#Life 1.06"):
+        return "life106"
+    if first.startswith("!") or set(first.strip()) <= set(".O*"):
+        return "plaintext"
+    return "rle"
+
+
+# Readers. Each yields runs of live cells as (k, 3) arrays of (x, y, length)
+# while reading the file incrementally, a block of runs at a time.
+
+def read_rle(f):
+    # Comment lines and the header come first, one per line
+    line = f.readline()
+    while line.startswith("#") or not line.strip():
+        if not line:
+            return
+        line = f.readline()
+    if _RLE_HEADER.match(line) is None:
+        raise ValueError(f"Missing RLE header line, got {line.strip()!r}")
+
+    x = y = 0
+    pending = ""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        data = pending + _WHITESPACE.sub("", chunk)
+        # Hold back a trailing run count that may continue in the next chunk
+        end = len(data)
+        if chunk:
+            while end and data[end - 1].isdigit():
+                end -= 1
+        pending = data[end:]
+        text = data[:end]
+        stop = text.find("!")
+        if stop >= 0:
+            text = text[:stop]
+        runs, x, y = _rle_runs(text, x, y)
+        if len(runs):
+            yield runs
+        if stop >= 0 or not chunk:
+            return
+
+
+def _rle_runs(text, x, y):
+    # Runs of live cells in RLE text without whitespace, starting at (x, y);
+    # also returns the position after it. Every non-digit is a tag taking
+    # the run count from the digits before it, so the whole piece is decoded
+    # with array operations rather than token by token.
+    data = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8)
+    digits = (data >= ord("0")) & (data <= ord("9"))
+    ends = np.flatnonzero(~digits)
+    if not ends.size:
+        return np.zeros((0, 3), dtype=np.int64), x, y
+    # A count after the last tag belongs to nothing
+    data, digits = data[:ends[-1] + 1], digits[:ends[-1] + 1]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Each digit times its place value within its run count
+    place = ends[np.searchsorted(ends, np.arange(data.size))] - np.arange(data.size) - 1
+    values = np.where(digits, (data.astype(np.int64) - ord("0")) * 10 ** np.clip(place, 0, 18), 0)
+    sums = np.concatenate(([0], np.cumsum(values)))
+    counts = np.where(ends > starts, sums[ends] - sums[starts], 1)
+
+    tags = data[ends]
+    newline = tags == ord("$")
+    dead = (tags == ord("b")) | (tags == ord("."))
+    # o, or a live state letter from a multi-state rule; anything else is
+    # skipped
+    letter = tags | 0x20
+    live = (letter >= ord("a")) & (letter <= ord("z")) & ~dead
+    advance = np.where(live | dead, counts, 0)
+    rows = y + np.cumsum(np.where(newline, counts, 0))
+    # x of each tag counts from the last $ before it, or from x
+    total = np.cumsum(advance)
+    last = np.maximum.accumulate(np.where(newline, np.arange(tags.size), -1))
+    origin = np.where(last >= 0, total[last], -x)
+    xs = total - advance - origin
+    runs = np.column_stack((xs[live], rows[live], counts[live]))
+    return runs, int(total[-1] - origin[-1]), int(rows[-1])
+
+
+def read_life106(f):
+    while True:
+        lines = f.readlines(CHUNK_SIZE)
+        if not lines:
+            return
+        cells = [line.split() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+        if cells:
+            runs = np.ones((len(cells), 3), dtype=np.int64)
+            runs[:, :2] = np.array(cells, dtype=np.int64)
+            yield runs
+
+
+def read_plaintext(f):
+    y = 0
+    while True:
+        lines = f.readlines(CHUNK_SIZE)
+        if not lines:
+            return
+        runs = []
+        for line in lines:
+            if line.startswith("!"):
+                continue
+            for match in _PLAINTEXT_RUN.finditer(line):
+                runs.append((match.start(), y, match.end() - match.start()))
+            y += 1
+        if runs:
+            yield np.array(runs, dtype=np.int64)
+
+
+READERS = {
+    "rle": read_rle,
+    "life106": read_life106,
+    "plaintext": read_plaintext,
+}
+
+
+def read_pattern(path):
+    # Live cells of a pattern file as an (n, 2) array of (x, y), shifted so
+    # the bounding box starts at (0, 0). Each block of runs is expanded as
+    # it is read, so only the cells are ever held in full.
+    with open(path, "r") as f:
+        blocks = [runs_to_cells(runs) for runs in READERS[detect_format(path)](f)]
+    if not blocks:
+        return np.zeros((0, 2), dtype=np.int64)
+    cells = np.concatenate(blocks)
+    del blocks
+    cells -= cells.min(axis=0)
+    return cells
+
+
+def runs_to_cells(runs):
+    xs, ys, lengths = runs[:, 0], runs[:, 1], runs[:, 2]
+    # Cell i of the output lies i - start cells into its run, where start is
+    # the index of the run's first cell
+    cells = np.empty((int(lengths.sum()), 2), dtype=np.int64)
+    cells[:, 0] = np.repeat(xs - (np.cumsum(lengths) - lengths), lengths)
+    cells[:, 0] += np.arange(len(cells))
+    cells[:, 1] = np.repeat(ys, lengths)
+    return cells
+
+
+# Writers. Each takes a dense (height, width) board and writes it row by row.
+
+def _row_runs(row):
+    # (start, length) of each run of live cells in a row
+    edges = np.diff(np.concatenate(([0], (row != 0).astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return zip(starts.tolist(), (np.flatnonzero(edges == -1) - starts).tolist())
+
+
+def write_rle(f, cells, name=None, rule="B3/S23"):
+    cells = np.asarray(cells)
+    height, width = cells.shape
+    if name:
+        f.write(f"#N {name}\n")
+    f.write(f"x = {width}, y = {height}, rule = {rule}\n")
+
+    line = []
+    line_len = 0
+
+    def emit(count, tag):
+        nonlocal line_len
+        token = f"{count if count > 1 else ''}{tag}"
+        if line_len + len(token) > RLE_LINE_WIDTH:
+            f.write("".join(line) + "\n")
+            line.clear()
+            line_len = 0
+        line.append(token)
+        line_len += len(token)
+
+    # Row the output is at; blank rows are skipped by the line breaks
+    row = 0
+    for y in range(height):
+        runs = list(_row_runs(cells[y]))
+        if not runs:
+            continue
+        if y > row:
+            emit(y - row, "$")
+        row = y
+        x = 0
+        for start, length in runs:
+            if start > x:
+                emit(start - x, "b")
+            emit(length, "o")
+            x = start + length
+    emit(1, "!")
+    f.write("".join(line) + "\n")
+
+
+def write_life106(f, cells):
+    f.write("#Life 1.06\n")
+    for y, row in enumerate(np.asarray(cells)):
+        for x in np.flatnonzero(row).tolist():
+            f.write(f"{x} {y}\n")
+
+
+def write_plaintext(f, cells, name=None):
+    if name:
+        f.write(f"!Name: {name}\n")
+    for row in np.asarray(cells):
+        f.write("".join("O" if cell else "." for cell in row.tolist()).rstrip(".") + "\n")
+
+
+def write_pattern(path, cells, name=None, rule="B3/S23"):
+    # Format follows the extension, RLE by default
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower(), "rle")
+    with open(path, "w") as f:
+        if fmt == "rle":
+            write_rle(f, cells, name, rule)
+        elif fmt == "plaintext":
+            write_plaintext(f, cells, name)
+        else:
+            write_life106(f, cells)
+
+
+class PatternLibrary:
+    # Directory of pattern files. The index of names is built on first use by
+    # listing the directory; a pattern is parsed the first time it is asked
+    # for and cached after that.
+    def __init__(self, directory):
+        self.directory = directory
+        self._index = None
+        self._cache = {}
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            if os.path.isdir(self.directory):
+                for entry in sorted(os.listdir(self.directory)):
+                    stem, ext = os.path.splitext(entry)
+                    if ext.lower() in FORMATS:
+                        self._index[stem.lower()] = os.path.join(self.directory, entry)
+        return self._index
+
+    def names(self):
+        return list(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def get(self, name):
+        cells = self._cache.get(name)
+        if cells is None:
+            cells = read_pattern(self.index[name])
+            self._cache[name] = cells
+        return cells
@@ -0,0 +1,188 @@
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+# Phases of the main loop, plus the simulation thread's step
+PHASES = ["frame", "events", "step", "render", "panel", "flip"]
+
+# Samples kept per phase for the rolling percentiles
+WINDOW = 1000
+PERCENTILES = (50, 95, 99)
+
+# Seconds between metrics dumps, and between refreshes of the summary shown
+# on screen
+DUMP_INTERVAL = 5.0
+SUMMARY_INTERVAL = 0.25
+
+# Functions printed when a cProfile capture ends
+PROFILE_TOP = 20
+
+_DISABLED = nullcontext()
+
+
+class _Profile(cProfile.Profile):
+    # One thread's capture; done once that thread has disabled it
+    done = False
+
+
+class _Timer:
+    __slots__ = ("profiler", "phase", "start")
+
+    def __init__(self, profiler, phase):
+        self.profiler = profiler
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.phase, time.perf_counter() - self.start)
+
+
+class Profiler:
+    # Rolling per-phase timings for the main loop and the simulation thread.
+    # While disabled, phase() hands out a shared no-op context and record()
+    # is never called, so the instrumentation costs an attribute check and a
+    # call per phase.
+    #
+    # Optionally dumps the summary to a CSV or JSON-lines file (by extension)
+    # every dump_interval seconds, and captures cProfile data on every thread
+    # that calls poll() while a capture is running.
+    def __init__(self, enabled=False, metrics_path=None, dump_interval=DUMP_INTERVAL, window=WINDOW):
+        self.enabled = enabled or metrics_path is not None
+        self.metrics_path = metrics_path
+        self.dump_interval = dump_interval
+        self._samples = {phase: np.zeros(window) for phase in PHASES}
+        self._counts = dict.fromkeys(PHASES, 0)
+        self._timers = {phase: _Timer(self, phase) for phase in PHASES}
+        self._next_dump = time.monotonic() + dump_interval
+        self._summary = None
+        self._summary_time = 0.0
+
+        self.capturing = False
+        self._profiles = {}
+        self._capture_path = None
+        self._capture_lock = threading.Lock()
+
+    # Timing
+
+    def phase(self, name):
+        # Context manager timing one phase; the timers are reused, so phases
+        # must not nest within themselves
+        if not self.enabled:
+            return _DISABLED
+        return self._timers[name]
+
+    def record(self, phase, seconds):
+        samples = self._samples[phase]
+        samples[self._counts[phase] % samples.size] = seconds
+        self._counts[phase] += 1
+
+    def reset(self):
+        for phase in PHASES:
+            self._counts[phase] = 0
+        self._summary = None
+
+    def summary(self):
+        # {phase: {count, mean, p50, p95, p99, max}} in milliseconds over the
+        # last `window` samples, for the phases that have any
+        result = {}
+        for phase in PHASES:
+            count = self._counts[phase]
+            if not count:
+                continue
+            samples = self._samples[phase][:min(count, self._samples[phase].size)] * 1000.0
+            stats = {"count": count, "mean": float(samples.mean())}
+            for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                stats[f"p{p}"] = float(value)
+            stats["max"] = float(samples.max())
+            result[phase] = stats
+        return result
+
+    def cached_summary(self):
+        # summary() recomputed at most every SUMMARY_INTERVAL seconds, for
+        # drawing every frame
+        now = time.monotonic()
+        if self._summary is None or now - self._summary_time >= SUMMARY_INTERVAL:
+            self._summary = self.summary()
+            self._summary_time = now
+        return self._summary
+
+    # Periodic work: poll() once per frame of the main loop, poll_capture()
+    # once per iteration of any other thread to be profiled
+
+    def poll(self):
+        self.poll_capture()
+        if self.metrics_path and time.monotonic() >= self._next_dump:
+            self.dump()
+            self._next_dump = time.monotonic() + self.dump_interval
+
+    def dump(self, path=None):
+        path = path or self.metrics_path
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        summary = self.summary()
+        if path.endswith(".csv"):
+            new = not os.path.exists(path)
+            with open(path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if new:
+                    writer.writerow(["time", "phase", "count", "mean_ms"] +
+                                    [f"p{p}_ms" for p in PERCENTILES] + ["max_ms"])
+                for phase, stats in summary.items():
+                    writer.writerow([timestamp, phase, stats["count"]] +
+                                    [round(stats[k], 4) for k in ["mean"] + [f"p{p}" for p in PERCENTILES] + ["max"]])
+        else:
+            with open(path, "a") as f:
+                f.write(json.dumps({"time": timestamp, "phases": summary}) + "\n")
+
+    # cProfile capture
+
+    def toggle_capture(self, path=None):
+        # Start a capture, or stop the running one; it is written to path
+        # (profile-<time>.prof by default) once every thread has stopped
+        if self.capturing:
+            self.capturing = False
+        else:
+            self._capture_path = path or time.strftime("profile-%Y%m%d-%H%M%S.prof")
+            self.capturing = True
+        with self._capture_lock:
+            self._update_capture()
+
+    def poll_capture(self):
+        if self.capturing or self._profiles:
+            with self._capture_lock:
+                self._update_capture()
+
+    def _update_capture(self):
+        profile = self._profiles.get(threading.get_ident())
+        if self.capturing and profile is None:
+            profile = _Profile()
+            self._profiles[threading.get_ident()] = profile
+            profile.enable()
+        elif not self.capturing and profile is not None and not profile.done:
+            # cProfile hooks only the thread that enabled it, so each thread
+            # stops its own capture
+            profile.disable()
+            profile.done = True
+        if not self.capturing and self._profiles and all(p.done for p in self._profiles.values()):
+            self._write_capture()
+
+    def _write_capture(self):
+        profiles = list(self._profiles.values())
+        self._profiles = {}
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self._capture_path)
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(f"Profile written to {self._capture_path}\n{out.getvalue()}")
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+# File layout: a header with the rule, then records up to the end of the
+# file. Each record is a header followed by a zlib-compressed payload:
+#   keyframe        - board width and height, then the board with one bit
+#                     per cell
+#   delta           - number of cells born and the width of a gap in bytes,
+#                     then the flat positions of the cells born and of the
+#                     cells that died, each stored as the gap from the
+#                     previous position
+# and for the dying states of Generations rules:
+#   states keyframe - board width and height, then one byte per cell
+#   states delta    - number of cells changed and the width of a gap in
+#                     bytes, then their positions as gaps and their new
+#                     states, one byte each
+# Records are only ever appended, so a recording cut short by a crash is
+# still readable up to its last complete record.
+MAGIC = b"GOLR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")  # magic, version, rule name length
+RECORD = struct.Struct("<BQI")  # kind, generation, payload length
+SIZE = struct.Struct("<II")
+DELTA_HEADER = struct.Struct("<QB")
+
+KEYFRAME = 0
+DELTA = 1
+STATES_KEYFRAME = 2
+STATES_DELTA = 3
+
+# Generations between keyframes by default
+KEYFRAME_INTERVAL = 100
+
+# Records waiting for the writer thread; the stepping thread only blocks if
+# the writer falls this far behind
+QUEUE_SIZE = 256
+
+Frame = namedtuple("Frame", ["generation", "cells"])
+
+
+GAP_DTYPES = {1: np.dtype("u1"), 2: np.dtype("<u2"), 4: np.dtype("<u4"), 8: np.dtype("<u8")}
+
+
+def _positions_to_gaps(*positions):
+    # Gaps in the narrowest integer type that holds the largest one; busy
+    # generations have small gaps and mostly need a byte each
+    gaps = np.concatenate([np.diff(p, prepend=0) for p in positions])
+    largest = int(gaps.max()) if gaps.size else 0
+    width = next(width for width, dtype in GAP_DTYPES.items() if largest <= np.iinfo(dtype).max)
+    return width, gaps.astype(GAP_DTYPES[width])
+
+
+class Recorder:
+    # Records a run as keyframes every `keyframe_interval` generations and
+    # per-generation deltas in between. record() is called from the stepping
+    # thread and only diffs the board; encoding, compression and file writes
+    # happen on a background writer thread.
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL, rule="B3/S23"):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self._file = open(path, "wb")
+        rule_bytes = rule.encode("utf-8")
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(rule_bytes)))
+        self._file.write(rule_bytes)
+
+        self._previous = None
+        self._generation = None
+        self._keyframe_generation = None
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._write_records, name="life-recorder", daemon=True)
+        self._writer.start()
+
+    def __call__(self, generation, cells):
+        self.record(generation, cells)
+
+    def record(self, generation, cells):
+        # A keyframe on the first call, every keyframe_interval generations,
+        # and whenever the board is resized or the generation goes backwards
+        # (a reset or a load); a delta against the last recorded board
+        # otherwise. Edits made between generations end up in the next delta.
+        previous = self._previous
+        if (previous is None or previous.shape != cells.shape or generation < self._generation or
+                generation - self._keyframe_generation >= self.keyframe_interval):
+            self._previous = np.array(cells, dtype=np.uint8)
+            self._keyframe_generation = generation
+            kind = STATES_KEYFRAME if self._previous.max(initial=0) > 1 else KEYFRAME
+            self._queue.put((kind, generation, self._previous.copy()))
+        else:
+            changed = np.flatnonzero(cells != previous)
+            states = cells.reshape(-1)[changed]
+            np.copyto(previous, cells)
+            if states.max(initial=0) > 1:
+                self._queue.put((STATES_DELTA, generation, (changed, states)))
+            else:
+                alive = states != 0
+                self._queue.put((DELTA, generation, (changed[alive], changed[~alive])))
+        self._generation = generation
+
+    def close(self):
+        # Write out everything recorded so far
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write_records(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, generation, data = item
+            if kind == KEYFRAME:
+                height, width = data.shape
+                payload = SIZE.pack(width, height) + np.packbits(data, bitorder="little").tobytes()
+            elif kind == STATES_KEYFRAME:
+                height, width = data.shape
+                payload = SIZE.pack(width, height) + data.tobytes()
+            elif kind == DELTA:
+                born, died = data
+                width, gaps = _positions_to_gaps(born, died)
+                payload = DELTA_HEADER.pack(born.size, width) + gaps.tobytes()
+            else:
+                changed, states = data
+                width, gaps = _positions_to_gaps(changed)
+                payload = DELTA_HEADER.pack(changed.size, width) + gaps.tobytes() + states.tobytes()
+            payload = zlib.compress(payload, 1)
+            self._file.write(RECORD.pack(kind, generation, len(payload)))
+            self._file.write(payload)
+        self._file.flush()
+
+
+def is_recording(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class RecordingReader:
+    # Random access to a recording. Opening it reads only the record headers;
+    # seek() decodes the nearest keyframe at or before the generation and
+    # applies the deltas after it.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        magic, version, rule_len = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Game of Life recording")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported recording version {version}")
+        self.rule = self._file.read(rule_len).decode("utf-8")
+
+        # (kind, generation, payload offset, payload length) of every
+        # complete record, in file order
+        self.records = []
+        size = os.fstat(self._file.fileno()).st_size
+        while True:
+            header = self._file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            kind, generation, length = RECORD.unpack(header)
+            offset = self._file.tell()
+            if offset + length > size:
+                break
+            self._file.seek(length, 1)
+            self.records.append((kind, generation, offset, length))
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def generations(self):
+        return [generation for _, generation, _, _ in self.records]
+
+    def _payload(self, index):
+        _, _, offset, length = self.records[index]
+        self._file.seek(offset)
+        return zlib.decompress(self._file.read(length))
+
+    def _keyframe(self, index):
+        payload = self._payload(index)
+        width, height = SIZE.unpack_from(payload)
+        data = np.frombuffer(payload, dtype=np.uint8, offset=SIZE.size)
+        if self.records[index][0] == STATES_KEYFRAME:
+            return data.reshape(height, width).copy()
+        return np.unpackbits(data, count=width * height, bitorder="little").reshape(height, width)
+
+    def _apply_delta(self, index, cells):
+        payload = self._payload(index)
+        count, width = DELTA_HEADER.unpack_from(payload)
+        flat = cells.reshape(-1)
+        if self.records[index][0] == STATES_DELTA:
+            gaps = np.frombuffer(payload, dtype=GAP_DTYPES[width], count=count, offset=DELTA_HEADER.size)
+            states = np.frombuffer(payload, dtype=np.uint8, offset=DELTA_HEADER.size + count * width)
+            flat[np.cumsum(gaps, dtype=np.int64)] = states
+            return
+        gaps = np.frombuffer(payload, dtype=GAP_DTYPES[width], offset=DELTA_HEADER.size)
+        flat[np.cumsum(gaps[:count], dtype=np.int64)] = 1
+        flat[np.cumsum(gaps[count:], dtype=np.int64)] = 0
+
+    def seek(self, generation):
+        # Board at the last recorded generation not after `generation`. If
+        # the run was reset or reloaded, the latest history wins.
+        start = None
+        for index, (kind, recorded, _, _) in enumerate(self.records):
+            if kind in (KEYFRAME, STATES_KEYFRAME) and recorded <= generation:
+                start = index
+        if start is None:
+            raise ValueError(f"{self.path} has no generation at or before {generation}")
+        cells = self._keyframe(start)
+        reached = self.records[start][1]
+        for index in range(start + 1, len(self.records)):
+            kind, recorded, _, _ = self.records[index]
+            if kind in (KEYFRAME, STATES_KEYFRAME) or recorded > generation:
+                break
+            self._apply_delta(index, cells)
+            reached = recorded
+        return Frame(reached, cells)
+
+    def frames(self):
+        # Every recorded generation in order; the yielded board is updated in
+        # place, so copy it to keep it
+        cells = None
+        for index, (kind, generation, _, _) in enumerate(self.records):
+            if kind in (KEYFRAME, STATES_KEYFRAME):
+                cells = self._keyframe(index)
+            else:
+                self._apply_delta(index, cells)
+            yield Frame(generation, cells)
@@ -0,0 +1,125 @@
+import numpy as np
+import pygame
+
+
+def state_colors(theme, states):
+    # Dead and alive, then the dying states of Generations rules fading from
+    # the alive color towards the dead one
+    colors = [theme["dead"], theme["alive"]]
+    for state in range(2, states):
+        t = (state - 1) / (states - 1)
+        colors.append(tuple(round(a + (d - a) * t) for a, d in zip(theme["alive"], theme["dead"])))
+    return colors
+
+
+# Renderers draw the visible slice of the world with its top-left cell at
+# pixel `origin`; the rest of the game panel, outside the world, gets the
+# panel color.
+def world_rect(cells, cell_size, width, height, origin):
+    # Screen area covered by the drawn cells, clipped to the game panel
+    rows, cols = cells.shape
+    return pygame.Rect(origin[0], origin[1], cols * cell_size, rows * cell_size).clip((0, 0, width, height))
+
+
+class RectRenderer:
+    # Original renderer: one pygame.draw.rect per live cell and one line per
+    # grid column and row, every frame
+    name = "rect"
+
+    def draw(self, screen, cells, cell_size, theme, show_grid, width, height, states=2, origin=(0, 0)):
+        # Draw game panel background
+        world = world_rect(cells, cell_size, width, height, origin)
+        pygame.draw.rect(screen, theme["panel"], (0, 0, width, height))
+        pygame.draw.rect(screen, theme["dead"], world)
+        screen.set_clip(world)
+
+        colors = state_colors(theme, states)
+        ox, oy = origin
+        ys, xs = np.nonzero(cells)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            rect = (ox + x * cell_size, oy + y * cell_size, max(1, cell_size - 1), max(1, cell_size - 1))
+            color = colors[cells[y, x]]
+            pygame.draw.rect(screen, color, rect)
+            if cell_size > 4:  # Only add glow effect for larger cells
+                pygame.draw.rect(screen, color, rect, 1)
+
+        # Draw grid lines
+        if show_grid and cell_size > 3:
+            for x in range(world.left + (ox - world.left) % cell_size, world.right + 1, cell_size):
+                pygame.draw.line(screen, theme["grid"], (x, world.top), (x, world.bottom))
+            for y in range(world.top + (oy - world.top) % cell_size, world.bottom + 1, cell_size):
+                pygame.draw.line(screen, theme["grid"], (world.left, y), (world.right, y))
+        screen.set_clip(None)
+
+
+class SurfaceRenderer:
+    # Writes the cell array into an 8-bit surface, one pixel per cell with the
+    # cell state as palette index, and scales it to the cell size in a single
+    # call. Cell gaps and grid lines live on a cached overlay that is only
+    # rebuilt when the panel size, cell size, theme or grid toggle changes, so
+    # frame time does not depend on the population. Panning only moves the
+    # overlay, which is one cell larger than the panel.
+    name = "surface"
+
+    def __init__(self):
+        self._cells = None
+        self._palette = None
+        self._overlay = None
+        self._overlay_key = None
+
+    def draw(self, screen, cells, cell_size, theme, show_grid, width, height, states=2, origin=(0, 0)):
+        world = world_rect(cells, cell_size, width, height, origin)
+        screen.fill(theme["panel"], (0, 0, width, height))
+        screen.fill(theme["dead"], world)
+        rows, cols = cells.shape
+        if not rows or not cols:
+            return
+        if self._cells is None or self._cells.get_size() != (cols, rows):
+            self._cells = pygame.Surface((cols, rows), 0, 8)
+            self._palette = None
+        palette = state_colors(theme, states)
+        if palette != self._palette:
+            self._cells.set_palette(palette)
+            self._palette = palette
+        # surfarray indexes (x, y)
+        pygame.surfarray.blit_array(self._cells, cells.T)
+
+        ox, oy = origin
+        scaled = pygame.transform.scale(self._cells, (cols * cell_size, rows * cell_size))
+        screen.set_clip(world)
+        screen.blit(scaled, origin)
+        overlay = self._overlay_for(cell_size, theme, show_grid, width, height)
+        screen.blit(overlay, (ox % cell_size - cell_size, oy % cell_size - cell_size))
+        screen.set_clip(None)
+
+    def _overlay_for(self, cell_size, theme, show_grid, width, height):
+        key = (cell_size, theme["dead"], theme["grid"], show_grid, width, height)
+        if key != self._overlay_key:
+            width += cell_size
+            height += cell_size
+            overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+            # Cells are drawn one pixel short of the cell size, leaving a gap
+            # of dead color on their right and bottom edges; one-pixel cells
+            # have no gap
+            if cell_size > 1:
+                for x in range(cell_size - 1, width, cell_size):
+                    pygame.draw.line(overlay, theme["dead"], (x, 0), (x, height))
+                for y in range(cell_size - 1, height, cell_size):
+                    pygame.draw.line(overlay, theme["dead"], (0, y), (width, y))
+            if show_grid and cell_size > 3:
+                for x in range(0, width + cell_size, cell_size):
+                    pygame.draw.line(overlay, theme["grid"], (x, 0), (x, height))
+                for y in range(0, height + cell_size, cell_size):
+                    pygame.draw.line(overlay, theme["grid"], (0, y), (width, y))
+            self._overlay = overlay
+            self._overlay_key = key
+        return self._overlay
+
+
+# Available renderers, selectable by name
+RENDERERS = {
+    "surface": SurfaceRenderer,
+    "rect": RectRenderer,
+}
+
+DEFAULT_RENDERER = "surface"
@@ -0,0 +1,112 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+CONWAY = "B3/S23"
+
+# Named rules, selectable wherever a rule string is accepted
+RULES = {
+    "conway": CONWAY,
+    "highlife": "B36/S23",
+    "day_and_night": "B3678/S34678",
+    "seeds": "B2/S",
+    "life_without_death": "B3/S012345678",
+    "brians_brain": "B2/S/C3",
+    "star_wars": "B2/S345/C4",
+}
+
+# B3/S23 with an optional state count for Generations rules: B2/S/C3, or
+# B2/S/3; also the older S/B and S/B/C orders, such as 23/3 and /2/3
+_BS = re.compile(r"^B(\d*)/S(\d*)(?:/C?(\d+))?$", re.IGNORECASE)
+_SB = re.compile(r"^(\d*)/(\d*)(?:/(\d+))?$")
+
+
+class Rule:
+    # An outer-totalistic rule compiled into lookup tables. Cells hold a state
+    # from 0 (dead) to states - 1; state 1 is alive and only state 1 counts as
+    # a neighbor. Life-like rules have two states. In Generations rules a live
+    # cell that does not survive moves to state 2 and then through the
+    # remaining states, one per generation, back to 0.
+    #   table         - (states, 9) next state by current state and live
+    #                   neighbor count
+    #   lookup        - table flattened, indexed by state * 9 + count
+    #   neighborhood  - 512 next states (life-like rules only) indexed by the
+    #                   3x3 neighborhood as bits, bit dy * 3 + dx for the
+    #                   cell at offset (dx - 1, dy - 1), so bit 4 is the cell
+    def __init__(self, birth, survival, states=2):
+        if states < 2 or states > 256:
+            raise ValueError(f"Rules need 2 to 256 states, got {states}")
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        self.states = states
+
+        table = np.zeros((states, 9), dtype=np.uint8)
+        dying = 2 if states > 2 else 0
+        for count in range(9):
+            table[0, count] = 1 if count in self.birth else 0
+            table[1, count] = 1 if count in self.survival else dying
+        for state in range(2, states):
+            table[state, :] = (state + 1) % states
+        self.table = table
+        self.lookup = table.reshape(-1)
+
+        self.neighborhood = None
+        if states == 2:
+            bits = np.arange(512)
+            cell = (bits >> 4) & 1
+            counts = sum((bits >> bit) & 1 for bit in range(9) if bit != 4)
+            self.neighborhood = table[cell, counts]
+
+    @property
+    def string(self):
+        birth = "".join(map(str, sorted(self.birth)))
+        survival = "".join(map(str, sorted(self.survival)))
+        states = f"/C{self.states}" if self.states > 2 else ""
+        return f"B{birth}/S{survival}{states}"
+
+    @property
+    def name(self):
+        # Preset name if there is one, otherwise the rule string
+        for name, text in RULES.items():
+            if parse_rule(text) is self:
+                return name
+        return self.string
+
+    @property
+    def is_conway(self):
+        return self.states == 2 and self.birth == {3} and self.survival == {2, 3}
+
+    def apply(self, states, counts):
+        # Next states for arrays of current states and live neighbor counts
+        index = np.multiply(states, 9, dtype=np.uint16)
+        index += counts
+        return np.take(self.lookup, index)
+
+    def __repr__(self):
+        return f"Rule({self.string!r})"
+
+
+@lru_cache(maxsize=None)
+def parse_rule(text):
+    # Rule from a preset name or a rule string. Equal rules parse to the same
+    # Rule object.
+    if isinstance(text, Rule):
+        return text
+    text = RULES.get(text.strip().lower(), text.strip())
+    match = _BS.match(text)
+    if match:
+        birth, survival, states = match.groups()
+    else:
+        match = _SB.match(text)
+        if match is None:
+            raise ValueError(f"Unknown rule '{text}', expected a name or a rule such as B3/S23")
+        survival, birth, states = match.groups()
+    if "9" in birth + survival:
+        raise ValueError(f"Neighbor counts in '{text}' must be 0 to 8")
+    return _compile(frozenset(map(int, birth)), frozenset(map(int, survival)), int(states or 2))
+
+
+@lru_cache(maxsize=None)
+def _compile(birth, survival, states):
+    return Rule(birth, survival, states)
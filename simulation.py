@@ -0,0 +1,381 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from cycles import HISTORY, CycleDetector
+from engines import DEFAULT_BOUNDARY, DEFAULT_ENGINE, DENSITY, create_engine
+from pattern_io import FORMATS, PatternLibrary, read_pattern, write_pattern
+from recorder import KEYFRAME_INTERVAL, Recorder, RecordingReader, is_recording
+from rules import CONWAY
+from snapshot import Snapshot, is_snapshot, load_snapshot, save_snapshot
+
+SAVE_FILE = "saved_grid.gol"
+
+# Directory of pattern files available by name, next to this module
+PATTERN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patterns")
+LIBRARY = PatternLibrary(PATTERN_DIR)
+
+# Patterns
+PATTERNS = {
+    "glider": [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)],
+    "blinker": [(1, 0), (1, 1), (1, 2)],
+    "block": [(0, 0), (0, 1), (1, 0), (1, 1)],
+    "beacon": [(0, 0), (1, 0), (0, 1), (3, 2), (2, 3), (3, 3)],
+    "toad": [(1, 1), (2, 1), (3, 1), (0, 2), (1, 2), (2, 2)],
+    "pulsar": [(2,0), (3,0), (4,0), (8,0), (9,0), (10,0),
+              (0,2), (5,2), (7,2), (12,2),
+              (0,3), (5,3), (7,3), (12,3),
+              (0,4), (5,4), (7,4), (12,4),
+              (2,5), (3,5), (4,5), (8,5), (9,5), (10,5),
+              (2,7), (3,7), (4,7), (8,7), (9,7), (10,7),
+              (0,8), (5,8), (7,8), (12,8),
+              (0,9), (5,9), (7,9), (12,9),
+              (0,10), (5,10), (7,10), (12,10),
+              (2,12), (3,12), (4,12), (8,12), (9,12), (10,12)]
+}
+
+
+def write_board(path, board, compression="zlib"):
+    # Write a Snapshot as a binary snapshot, the plain text grid for paths
+    # ending in .txt, or the live cells' bounding box for pattern file
+    # extensions
+    cells = board.cells
+    if os.path.splitext(path)[1].lower() in FORMATS:
+        ys, xs = np.nonzero(cells)
+        if xs.size:
+            cells = cells[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+        write_pattern(path, cells, rule=board.rule)
+    elif path.endswith(".txt"):
+        with open(path, "w") as f:
+            for row in cells.tolist():
+                f.write(" ".join(map(str, row)) + "\n")
+    else:
+        save_snapshot(path, cells, board.generation, board.rule, board.engine,
+                      compression=compression)
+
+
+def read_board(path, generation=None):
+    # Snapshot of a snapshot file, a recording or a text grid. A recording
+    # is read at the given generation, or at its last one. Text grids have
+    # no rule.
+    if is_recording(path):
+        reader = RecordingReader(path)
+        try:
+            if generation is None:
+                generation = max(reader.generations)
+            generation, cells = reader.seek(generation)
+            return Snapshot(cells, generation, reader.rule, "")
+        finally:
+            reader.close()
+    if is_snapshot(path):
+        return load_snapshot(path)
+    with open(path, "r") as f:
+        cells = np.array([list(map(int, line.split())) for line in f if line.strip()],
+                         dtype=np.uint8)
+    return Snapshot(cells, 0, None, "")
+
+
+class Simulation:
+    # Board state and stepping, independent of any display. The pygame front
+    # end and the headless runner both drive one of these. Every method that
+    # touches the board holds `lock`, so a SimulationThread can step while
+    # another thread edits or reads the board; readers that use the engine
+    # directly should hold the lock too.
+    def __init__(self, width, height, engine=DEFAULT_ENGINE, seed=None, rule=CONWAY,
+                 boundary=DEFAULT_BOUNDARY, **options):
+        self.engine = create_engine(engine, width, height, rule=rule, boundary=boundary, **options)
+        self.rng = np.random.default_rng(seed)
+        # Share of live cells in randomized boards, including reseeds
+        self.density = DENSITY
+        self.lock = threading.RLock()
+        # Callables taking (generation, cells), run under the lock after every
+        # step and jump; cells is the engine's board and must not be modified
+        self.observers = []
+        # Optional CycleDetector and what to do when it finds a cycle; see
+        # detect_cycles
+        self.cycles = None
+        self.on_cycle = None
+        self.cycles_found = 0
+        self.halted = False
+
+    @property
+    def width(self):
+        return self.engine.width
+
+    @property
+    def height(self):
+        return self.engine.height
+
+    @property
+    def generation(self):
+        return self.engine.generation
+
+    @property
+    def rule(self):
+        return self.engine.rule
+
+    def set_rule(self, rule):
+        # Raises ValueError if the engine cannot run the rule
+        with self.lock:
+            self.engine.set_rule(rule)
+            self._edited()
+
+    @property
+    def boundary(self):
+        return self.engine.boundary
+
+    def set_boundary(self, boundary):
+        # Raises ValueError if the engine has no such boundary
+        with self.lock:
+            self.engine.set_boundary(boundary)
+            self._edited()
+
+    def step(self, generations=1):
+        # Returns the number of generations stepped, which is smaller if a
+        # cycle halted the run; `halted` tells the two apart
+        self.halted = False
+        for stepped in range(1, generations + 1):
+            with self.lock:
+                self.engine.step()
+                self._notify()
+                if self.cycles is not None:
+                    self._check_cycle()
+            if self.halted:
+                return stepped
+        return generations
+
+    def jump(self, generations):
+        # Fast-forward; see Engine.jump
+        with self.lock:
+            self.engine.jump(generations)
+            self._notify()
+            self._edited()
+
+    def _notify(self):
+        if self.observers:
+            cells = self.engine.to_array()
+            for observer in self.observers:
+                observer(self.generation, cells)
+
+    def detect_cycles(self, on_cycle="report", history=HISTORY):
+        # Watch for the board repeating within `history` generations.
+        # on_cycle is one of cycles.ACTIONS, or None to turn detection off.
+        with self.lock:
+            self.on_cycle = on_cycle
+            self.cycles = CycleDetector(history) if on_cycle else None
+            self.engine.track_changes = bool(on_cycle)
+            self.engine.changed = None
+            self._edited()
+
+    def _check_cycle(self):
+        if self.cycles.update(self.generation, self.engine.to_array(), self.engine.changed) is None:
+            return
+        self.cycles_found += 1
+        if self.on_cycle == "stop":
+            self.halted = True
+        elif self.on_cycle == "reseed":
+            self.randomize()
+
+    def _edited(self):
+        # The board changed other than by stepping, so earlier hashes no
+        # longer predict anything
+        if self.cycles is not None:
+            self.cycles.reset()
+            self.cycles.update(self.generation, self.engine.to_array())
+
+    def start_recording(self, path, keyframe_interval=KEYFRAME_INTERVAL):
+        # Record the current board and every generation after it to path
+        recorder = Recorder(path, keyframe_interval, self.rule.string)
+        with self.lock:
+            recorder.record(self.generation, self.engine.to_array())
+            self.observers.append(recorder)
+        return recorder
+
+    def stop_recording(self, recorder):
+        with self.lock:
+            self.observers.remove(recorder)
+        recorder.close()
+
+    def reset(self):
+        with self.lock:
+            self.engine.reset()
+            self._edited()
+
+    def randomize(self, density=None, region=None):
+        # Random board at `density` (self.density by default), inside region
+        # (x, y, w, h) only if given
+        with self.lock:
+            self.engine.randomize(self.rng, self.density if density is None else density, region)
+            self._edited()
+
+    def view_board(self, board):
+        # Show another board of a batch engine; wraps around
+        with self.lock:
+            self.engine.view = board % self.engine.boards
+            self._edited()
+
+    def close(self):
+        # Shut down the engine's worker threads, if any; call once the
+        # simulation is no longer stepped
+        with self.lock:
+            self.engine.close()
+
+    def resize(self, width, height, x_offset=0, y_offset=0):
+        with self.lock:
+            self.engine.resize(width, height, x_offset, y_offset)
+            self._edited()
+
+    def snapshot(self):
+        # Copy of the board as a Snapshot with read-only cells, for work done
+        # without holding the lock
+        with self.lock:
+            cells = self.engine.to_array().copy()
+            board = Snapshot(cells, self.generation, self.rule.string, self.engine.name)
+        cells.setflags(write=False)
+        return board
+
+    def paint(self, cells, value=1):
+        # Set every (x, y) in an (n, 2) array-like to value in one edit;
+        # cells off a bounded board are dropped
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        with self.lock:
+            cells = self._on_board(cells)
+            if len(cells):
+                self.engine.set_cells(cells, value)
+                self._edited()
+
+    def _on_board(self, cells):
+        # The (x, y) rows of cells that a bounded board holds; unbounded
+        # engines take them all
+        if not self.engine.bounded:
+            return cells
+        inside = ((cells >= 0).all(axis=1) & (cells[:, 0] < self.width) &
+                  (cells[:, 1] < self.height))
+        return cells[inside]
+
+    def save(self, path=SAVE_FILE, compression="zlib"):
+        # See write_board for the formats
+        write_board(path, self.snapshot(), compression)
+
+    def load(self, path=SAVE_FILE, generation=None):
+        # Accepts snapshots, recordings and text grids; see read_board and
+        # load_board
+        self.load_board(read_board(path, generation))
+
+    def load_board(self, board):
+        # Replace the board with a Snapshot in one go. A board of another
+        # size is centered on the current one and cropped to it. The saved
+        # rule is restored if the engine can run it; a generation of None
+        # keeps the current one.
+        cells = board.cells
+        with self.lock:
+            if board.rule and self.engine.supports(board.rule):
+                self.engine.set_rule(board.rule)
+            if cells.max(initial=0) >= self.rule.states:
+                cells = np.where(cells < self.rule.states, cells, 0).astype(np.uint8)
+            width, height = self.width, self.height
+            self.engine.load_array(cells)
+            if board.generation is not None:
+                self.engine.generation = board.generation
+            if (self.width, self.height) != (width, height):
+                self.engine.resize(width, height, (width - self.width) // 2,
+                                   (height - self.height) // 2)
+            self._edited()
+
+    def pattern_cells(self, pattern):
+        # Cells of a built-in pattern, a library pattern or a pattern file as
+        # an (n, 2) array of (x, y) with the bounding box at (0, 0)
+        if pattern in PATTERNS:
+            cells = np.array(PATTERNS[pattern], dtype=np.int64)
+            return cells - cells.min(axis=0)
+        if pattern in LIBRARY:
+            return LIBRARY.get(pattern)
+        if os.path.isfile(pattern):
+            return read_pattern(pattern)
+        raise KeyError(f"Unknown pattern '{pattern}'")
+
+    def place_pattern(self, pattern, x=None, y=None, reset=False):
+        # Stamp a pattern with its top-left corner at (x, y), centered on the
+        # board by default. Cells off a bounded board are dropped.
+        self.place_cells(self.pattern_cells(pattern), x, y, reset)
+
+    def place_cells(self, cells, x=None, y=None, reset=False):
+        # place_pattern for cells from pattern_cells
+        with self.lock:
+            if reset:
+                self.engine.reset()
+            if not len(cells):
+                self._edited()
+                return
+            pattern_width, pattern_height = cells.max(axis=0) + 1
+            if x is None:
+                x = self.width // 2 - pattern_width // 2
+            if y is None:
+                y = self.height // 2 - pattern_height // 2
+            cells = self._on_board(cells + (x, y))
+            self.engine.set_cells(cells)
+            self._edited()
+
+    def load_pattern(self, pattern_name):
+        # Clear the board and center the pattern on it
+        self.place_pattern(pattern_name, reset=True)
+
+
+class SimulationThread(threading.Thread):
+    # Steps a Simulation on its own thread, independently of any rendering.
+    # target_rate is in generations per second; None runs as fast as possible.
+    # `rate` is the measured generations per second over the last second.
+    # An optional Profiler times every step and can capture this thread.
+    def __init__(self, simulation, target_rate=None, profiler=None):
+        super().__init__(name="life-simulation", daemon=True)
+        self.simulation = simulation
+        self.target_rate = target_rate
+        self.profiler = profiler
+        self.running = False
+        self.rate = 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        next_step = time.perf_counter()
+        window_start, window_steps = next_step, 0
+        profiler = self.profiler
+        while not self._stopped.is_set():
+            if profiler is not None:
+                profiler.poll_capture()
+            if not self.running:
+                self.rate = 0.0
+                self._stopped.wait(0.01)
+                next_step = window_start = time.perf_counter()
+                window_steps = 0
+                continue
+
+            if profiler is not None and profiler.enabled:
+                start = time.perf_counter()
+                self.simulation.step()
+                profiler.record("step", time.perf_counter() - start)
+            else:
+                self.simulation.step()
+            window_steps += 1
+            if self.simulation.halted:
+                self.running = False
+            now = time.perf_counter()
+            if now - window_start >= 1.0:
+                self.rate = window_steps / (now - window_start)
+                window_start, window_steps = now, 0
+
+            if self.target_rate:
+                next_step += 1.0 / self.target_rate
+                delay = next_step - now
+                if delay > 0:
+                    self._stopped.wait(delay)
+                elif delay < -0.25:
+                    # Fell far behind (slow engine or large board): don't try to catch up
+                    next_step = now
+            else:
+                # Let other threads take the lock between generations
+                time.sleep(0)
+
+    def stop(self):
+        self._stopped.set()
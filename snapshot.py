@@ -0,0 +1,130 @@
+import lzma
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+import numpy as np
+
+# File layout: a fixed header, the rule and engine names as UTF-8, then the
+# body up to the end of the file. All integers are little-endian.
+MAGIC = b"GOLB"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBIIQHH")  # magic, version, encoding, compression,
+                                       # width, height, generation, rule and engine name lengths
+
+# Body encodings. "packed" stores one bit per cell in row-major order. "rle"
+# stores, for each live cell, the run of dead cells before it, which is far
+# smaller for sparse boards. "states" stores one byte per cell, for the
+# dying states of Generations rules. "auto" picks whichever is smaller of
+# the encodings that can hold the board.
+ENCODINGS = {"packed": 0, "rle": 1, "states": 2}
+COMPRESSIONS = {"none": 0, "zlib": 1, "lzma": 2}
+
+Snapshot = namedtuple("Snapshot", ["cells", "generation", "rule", "engine"])
+
+
+def _compress(data, compression):
+    if compression == "zlib":
+        return zlib.compress(data, 6)
+    if compression == "lzma":
+        return lzma.compress(data)
+    return data
+
+
+def _decompress(data, compression):
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "lzma":
+        return lzma.decompress(data)
+    return data
+
+
+def _gap_dtype(cell_count):
+    return np.dtype("<u4") if cell_count < 2 ** 32 else np.dtype("<u8")
+
+
+def save_snapshot(path, cells, generation=0, rule="B3/S23", engine="",
+                  encoding="auto", compression="zlib"):
+    cells = np.asarray(cells)
+    height, width = cells.shape
+    if encoding not in ENCODINGS and encoding != "auto":
+        raise ValueError(f"Unknown encoding '{encoding}'")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'")
+
+    flat = cells.reshape(-1)
+    gap_dtype = _gap_dtype(flat.size)
+    multistate = flat.size and flat.max() > 1
+    if encoding == "auto":
+        population = np.count_nonzero(flat)
+        if multistate:
+            encoding = "states"
+        else:
+            encoding = "rle" if population * gap_dtype.itemsize < (flat.size + 7) // 8 else "packed"
+    elif multistate and encoding != "states":
+        raise ValueError(f"The {encoding} encoding only holds live and dead cells")
+
+    if encoding == "rle":
+        # Only scan rows that hold live cells
+        rows = np.flatnonzero(cells.any(axis=1))
+        ys, xs = np.nonzero(cells[rows])
+        positions = rows[ys].astype(np.int64) * width + xs
+        gaps = np.diff(positions, prepend=-1) - 1
+        body = gaps.astype(gap_dtype).tobytes()
+    elif encoding == "states":
+        body = flat.astype(np.uint8).tobytes()
+    else:
+        body = np.packbits(flat != 0, bitorder="little").tobytes()
+    body = _compress(body, compression)
+
+    rule_bytes = rule.encode("utf-8")
+    engine_bytes = engine.encode("utf-8")
+    header = HEADER.pack(MAGIC, VERSION, ENCODINGS[encoding], COMPRESSIONS[compression],
+                         width, height, generation, len(rule_bytes), len(engine_bytes))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(rule_bytes)
+        f.write(engine_bytes)
+        f.write(body)
+
+
+def is_snapshot(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_snapshot(path):
+    with open(path, "rb") as f:
+        fields = HEADER.unpack(f.read(HEADER.size))
+        magic, version, encoding, compression, width, height, generation, rule_len, engine_len = fields
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a Game of Life snapshot")
+        if version != VERSION:
+            raise ValueError(f"{path} has unsupported snapshot version {version}")
+        rule = f.read(rule_len).decode("utf-8")
+        engine = f.read(engine_len).decode("utf-8")
+        offset = f.tell()
+
+    encoding = {v: k for k, v in ENCODINGS.items()}[encoding]
+    compression = {v: k for k, v in COMPRESSIONS.items()}[compression]
+
+    # Map the body instead of reading it, so uncompressed boards are decoded
+    # straight from the page cache
+    body_size = os.path.getsize(path) - offset
+    body = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(body_size,)) \
+        if body_size else np.zeros(0, dtype=np.uint8)
+    if compression != "none":
+        body = np.frombuffer(_decompress(body, compression), dtype=np.uint8)
+
+    cell_count = width * height
+    if encoding == "rle":
+        gaps = body.view(_gap_dtype(cell_count))
+        positions = np.cumsum(gaps.astype(np.int64) + 1) - 1
+        flat = np.zeros(cell_count, dtype=np.uint8)
+        flat[positions] = 1
+    elif encoding == "states":
+        flat = body[:cell_count]
+    else:
+        flat = np.unpackbits(body, count=cell_count, bitorder="little")
+    return Snapshot(flat.reshape(height, width), generation, rule, engine)
@@ -0,0 +1,371 @@
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from engines import DENSITY, create_engine, random_soup
+from pattern_io import write_rle
+from rules import CONWAY, parse_rule
+from simulation import PATTERNS
+
+# Census soups: SOUP_SIZE x SOUP_SIZE random squares at DENSITY, each run
+# until it settles
+SOUP_SIZE = 16
+SOUPS = 1000
+
+# A soup has settled once its population repeats with a period of at most
+# MAX_PERIOD over the last SETTLE_WINDOW generations; escaping gliders keep
+# the population constant, so they do not hold it up. This is checked every
+# CHECK_INTERVAL generations, up to MAX_GENERATIONS.
+MAX_PERIOD = 60
+SETTLE_WINDOW = 4 * MAX_PERIOD
+CHECK_INTERVAL = 30
+MAX_GENERATIONS = 20000
+
+# Soups run on the numpy engine, on a board cropped to the live cells plus
+# MARGIN dead cells at every check. Nothing travels faster than a cell per
+# generation, so the dead edge is never reached between checks and the soup
+# runs as on the unbounded plane.
+MARGIN = CHECK_INTERVAL + 1
+
+# Spaceships farther than this beyond everything else and moving away are
+# counted and taken off the board, so escaping gliders don't keep growing it
+ESCAPE_DISTANCE = 8
+
+# Soups handed to a worker process at a time
+CHUNK_SIZE = 50
+
+# Common soup objects that are not among the built-in patterns, as (x, y)
+# cells like PATTERNS
+COMMON_OBJECTS = {
+    "beehive": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (2, 2)],
+    "loaf": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (3, 2), (2, 3)],
+    "boat": [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2)],
+    "ship": [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2), (2, 2)],
+    "tub": [(1, 0), (0, 1), (2, 1), (1, 2)],
+    "pond": [(1, 0), (2, 0), (0, 1), (3, 1), (0, 2), (3, 2), (1, 3), (2, 3)],
+}
+
+# Live cells closer than this (in both x and y) belong to the same object;
+# cells two apart still share a neighbor and so interact. Groups that are not
+# in the catalog are split further into 8-connected parts when those do not
+# actually interact; see _parts.
+OBJECT_DISTANCE = 2
+
+
+def soup_rng(seed, index):
+    # Independent random stream for soup `index` of a census, the same
+    # whatever worker or chunk it runs in
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def canonical(cells):
+    # Key of an object's shape, equal for every translation, rotation and
+    # reflection: the smallest of its eight orientations as sorted bytes
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    keys = []
+    for swap in (False, True):
+        oriented = cells[:, ::-1] if swap else cells
+        for sx in (1, -1):
+            for sy in (1, -1):
+                flipped = oriented * (sx, sy)
+                flipped = flipped - flipped.min(axis=0)
+                flipped = flipped[np.lexsort((flipped[:, 0], flipped[:, 1]))]
+                keys.append(flipped.astype(np.int32).tobytes())
+    return min(keys)
+
+
+def to_rle(key):
+    # RLE body of a canonical() key, naming objects that have no name
+    cells = np.frombuffer(key, dtype=np.int32).reshape(-1, 2)
+    board = np.zeros(tuple(cells.max(axis=0)[::-1] + 1), dtype=np.uint8)
+    board[cells[:, 1], cells[:, 0]] = 1
+    out = io.StringIO()
+    write_rle(out, board)
+    return "".join(out.getvalue().splitlines()[1:])
+
+
+def split_objects(cells, distance=OBJECT_DISTANCE):
+    # Groups of live cells within `distance` of each other
+    offsets = [(dx, dy) for dy in range(-distance, distance + 1)
+               for dx in range(-distance, distance + 1) if dx or dy]
+    remaining = set(cells)
+    objects = []
+    while remaining:
+        seed = remaining.pop()
+        group, frontier = [seed], [seed]
+        while frontier:
+            x, y = frontier.pop()
+            for dx, dy in offsets:
+                cell = (x + dx, y + dy)
+                if cell in remaining:
+                    remaining.remove(cell)
+                    group.append(cell)
+                    frontier.append(cell)
+        objects.append(group)
+    return objects
+
+
+def _evolve(cells, generations, rule):
+    # Cells of an isolated object after some generations on the plane
+    engine = create_engine("sparse", 1, 1, rule=rule)
+    engine.set_cells(cells)
+    for _ in range(generations):
+        engine.step()
+    return list(engine.cells)
+
+
+def catalog(rule=CONWAY):
+    # canonical() key -> (name, period, moves) for every phase of the
+    # built-in patterns and COMMON_OBJECTS that return to their first phase,
+    # possibly moved, within MAX_PERIOD generations under `rule`. Guns and
+    # other growing patterns never do and are left out.
+    def shape(cells):
+        # Cells moved to the origin, compared without rotating or reflecting
+        cells = np.array(sorted(cells), dtype=np.int64)
+        return cells - cells.min(axis=0), tuple(cells.min(axis=0))
+
+    known = {}
+    for name, cells in {**PATTERNS, **COMMON_OBJECTS}.items():
+        engine = create_engine("sparse", 1, 1, rule=rule)
+        engine.set_cells(cells)
+        first, position = shape(engine.cells)
+        phases = [canonical(list(engine.cells))]
+        for period in range(1, MAX_PERIOD + 1):
+            engine.step()
+            if not engine.cells or len(split_objects(engine.cells)) != 1:
+                break
+            current, moved_to = shape(engine.cells)
+            if current.shape == first.shape and (current == first).all():
+                for phase in phases:
+                    known.setdefault(phase, (name, period, moved_to != position))
+                break
+            phases.append(canonical(list(engine.cells)))
+    return known
+
+
+def _parts(group, known, rule):
+    # Names of the 8-connected parts of a group that is not in the catalog,
+    # if every part is and the group evolves exactly as the parts do on
+    # their own over a common period of theirs (at most MAX_PERIOD
+    # generations); None otherwise
+    parts = split_objects(group, 1)
+    if len(parts) < 2:
+        return None
+    found = [known.get(canonical(part)) for part in parts]
+    if None in found:
+        return None
+    whole = create_engine("sparse", 1, 1, rule=rule)
+    whole.set_cells(group)
+    engines = []
+    for part in parts:
+        engines.append(create_engine("sparse", 1, 1, rule=rule))
+        engines[-1].set_cells(part)
+    for _ in range(min(MAX_PERIOD, math.lcm(*(period for _, period, _ in found)))):
+        whole.step()
+        for engine in engines:
+            engine.step()
+        if whole.cells != set().union(*(engine.cells for engine in engines)):
+            return None
+    return [name for name, _, _ in found]
+
+
+def _board(cells):
+    # Dense board holding (x, y) cells with MARGIN dead cells around them
+    cells = np.array(cells, dtype=np.int64).reshape(-1, 2)
+    cells -= cells.min(axis=0) - MARGIN
+    width, height = cells.max(axis=0) + MARGIN + 1
+    board = np.zeros((height, width), dtype=np.uint8)
+    board[cells[:, 1], cells[:, 0]] = 1
+    return board
+
+
+def _escaping(group, period, others, rule):
+    # Whether a spaceship lies ESCAPE_DISTANCE beyond the bounding box of
+    # all other cells on some side and moves away from it on that side
+    if not len(others):
+        return True
+    cells = np.array(group)
+    low, high = cells.min(axis=0), cells.max(axis=0)
+    velocity = np.array(_evolve(group, period, rule)).min(axis=0) - low
+    others_low, others_high = others.min(axis=0), others.max(axis=0)
+    ahead = (low > others_high + ESCAPE_DISTANCE) & (velocity > 0)
+    behind = (high < others_low - ESCAPE_DISTANCE) & (velocity < 0)
+    return bool((ahead | behind).any())
+
+
+def settled(populations):
+    # Smallest period the population has kept over the last SETTLE_WINDOW
+    # generations, or None
+    if len(populations) < SETTLE_WINDOW:
+        return None
+    window = populations[-SETTLE_WINDOW:]
+    for period in range(1, MAX_PERIOD + 1):
+        if window[period:] == window[:-period]:
+            return period
+    return None
+
+
+def run_soup(seed, index, size=SOUP_SIZE, density=DENSITY, rule=CONWAY, known=None):
+    # Run one soup until it settles; returns (generations, settled, objects)
+    # with objects a Counter of names, and of "other:<rle>" for shapes not in
+    # the catalog
+    if known is None:
+        known = catalog(rule)
+    ys, xs = np.nonzero(random_soup(size, size, density, soup_rng(seed, index)))
+    live = list(zip(xs.tolist(), ys.tolist()))
+    engine = create_engine("numpy", 1, 1, rule=rule)
+    # Populations of the catalog's spaceships; only groups of these sizes are
+    # looked up while the soup runs
+    spaceship_sizes = {len(key) // 8 for key, (_, _, moves) in known.items() if moves}
+    objects = Counter()
+    # Escaped spaceships still count towards the population, so removing
+    # them does not look like a change
+    escaped = 0
+    populations = []
+    generation = 0
+    done = False
+    while live and generation < MAX_GENERATIONS:
+        engine.load_array(_board(live))
+        for _ in range(CHECK_INTERVAL):
+            engine.step()
+            populations.append(engine.population() + escaped)
+        generation += CHECK_INTERVAL
+        ys, xs = np.nonzero(engine.to_array())
+        live = list(zip(xs.tolist(), ys.tolist()))
+
+        groups = split_objects(live)
+        for i, group in enumerate(groups):
+            if len(group) not in spaceship_sizes:
+                continue
+            name, period, moves = known.get(canonical(group), (None, 0, False))
+            if not moves:
+                continue
+            others = [cell for other in groups[:i] + groups[i + 1:] for cell in other]
+            if _escaping(group, period, np.array(others).reshape(-1, 2), rule):
+                objects[name] += 1
+                escaped += len(group)
+                live = others
+                groups[i] = []
+        if settled(populations) is not None:
+            done = True
+            break
+        del populations[:-SETTLE_WINDOW]
+    done = done or not live
+
+    for group in split_objects(live):
+        key = canonical(group)
+        if key in known:
+            objects[known[key][0]] += 1
+            continue
+        names = _parts(group, known, rule)
+        if names:
+            objects.update(names)
+        else:
+            objects["other:" + to_rle(key)] += 1
+    return generation, done, objects
+
+
+def _run_chunk(seed, start, count, size, density, rule):
+    known = catalog(rule)
+    generations, unsettled, objects = 0, 0, Counter()
+    for index in range(start, start + count):
+        ran, done, found = run_soup(seed, index, size, density, rule, known)
+        generations += ran
+        unsettled += not done
+        objects.update(found)
+    return count, generations, unsettled, objects
+
+
+def census(soups=SOUPS, seed=0, size=SOUP_SIZE, density=DENSITY, rule=CONWAY, workers=None,
+           progress=None):
+    # Run soups 0 .. soups - 1 of a seeded census across worker processes and
+    # count the objects they settle into. progress, if given, is called with
+    # the number of soups done after every chunk.
+    rule = parse_rule(rule).string
+    workers = workers or os.cpu_count()
+    totals = {"generations": 0, "unsettled": 0, "objects": Counter()}
+    done = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        chunks = [pool.submit(_run_chunk, seed, first, min(CHUNK_SIZE, soups - first), size, density, rule)
+                  for first in range(0, soups, CHUNK_SIZE)]
+        for chunk in chunks:
+            count, generations, unsettled, objects = chunk.result()
+            done += count
+            totals["generations"] += generations
+            totals["unsettled"] += unsettled
+            totals["objects"].update(objects)
+            if progress:
+                progress(done)
+    elapsed = time.perf_counter() - start
+
+    objects = totals["objects"]
+    return {
+        "soups": soups,
+        "seed": seed,
+        "size": size,
+        "density": density,
+        "rule": rule,
+        "seconds": elapsed,
+        "soups_per_sec": soups / elapsed if elapsed > 0 else None,
+        "mean_generations": totals["generations"] / soups if soups else 0,
+        "unsettled": totals["unsettled"],
+        "objects": dict(objects.most_common()),
+        "total_objects": sum(objects.values()),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Census of the objects random soups settle into")
+    parser.add_argument("--soups", type=int, default=SOUPS, help=f"soups to run (default: {SOUPS})")
+    parser.add_argument("--seed", type=int, default=0, help="census seed; soup i is the same in every run")
+    parser.add_argument("--size", type=int, default=SOUP_SIZE,
+                        help=f"edge length of the soup square (default: {SOUP_SIZE})")
+    parser.add_argument("--density", type=float, default=DENSITY,
+                        help=f"share of live cells in a soup (default: {DENSITY})")
+    parser.add_argument("--rule", default=CONWAY, help=f"life-like rule without B0 (default: {CONWAY})")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--out", help="file to write the JSON report to (default: stdout)")
+    args = parser.parse_args(argv)
+    try:
+        rule = parse_rule(args.rule)
+    except ValueError as e:
+        parser.error(str(e))
+    if rule.states != 2 or 0 in rule.birth:
+        parser.error(f"the census needs a life-like rule without B0, got {rule.string}")
+    if not 0 <= args.density <= 1:
+        parser.error(f"density must be between 0 and 1, got {args.density}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    def progress(done):
+        print(f"\r{done}/{args.soups} soups", end="", file=sys.stderr, flush=True)
+
+    report = census(args.soups, args.seed, args.size, args.density, args.rule, args.workers, progress)
+    print(file=sys.stderr)
+    for name, count in list(report["objects"].items())[:20]:
+        print(f"{count:>8}  {name}", file=sys.stderr)
+    print(f"{report['soups']} soups in {report['seconds']:.1f}s ({report['soups_per_sec']:.1f} soups/s), "
+          f"{report['unsettled']} unsettled after {MAX_GENERATIONS} generations", file=sys.stderr)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
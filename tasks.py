@@ -0,0 +1,104 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engines import random_soup
+from simulation import SAVE_FILE, read_board, write_board
+from snapshot import Snapshot
+
+# Seconds the outcome of the last task stays on the status line
+STATUS_TIME = 4.0
+
+
+class TaskRunner:
+    # Runs slow board work (saving, loading, random boards, pattern files) on
+    # one worker thread, in the order it was asked for, so the window keeps
+    # drawing and the simulation keeps stepping meanwhile. A task reads an
+    # immutable snapshot taken when it is submitted and never touches the
+    # board while it works; its result is then applied in one go under the
+    # simulation lock, which the simulation only releases between
+    # generations.
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="life-tasks")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._current = None
+        self._last = None
+
+    def submit(self, name, work, apply=None):
+        # Run work() on the worker, then apply(result) under the lock
+        with self._lock:
+            self._queued += 1
+        return self._executor.submit(self._run, name, work, apply)
+
+    def _run(self, name, work, apply):
+        start = time.perf_counter()
+        with self._lock:
+            self._current = (name, start)
+        try:
+            result = work()
+            if apply is not None:
+                with self.simulation.lock:
+                    apply(result)
+            message = f"{name} done in {time.perf_counter() - start:.1f}s"
+        except Exception as e:
+            # Report the failure instead of leaving it in the future
+            print(f"{name} failed: {e}")
+            message = f"{name} failed"
+        with self._lock:
+            self._queued -= 1
+            self._current = None
+            self._last = (message, time.monotonic())
+
+    @property
+    def busy(self):
+        return self._queued > 0
+
+    def status(self):
+        # Line for the control panel: the running task with its elapsed time
+        # and the number waiting behind it, then the outcome of the last task
+        # for STATUS_TIME seconds; None otherwise
+        with self._lock:
+            if self._current:
+                name, start = self._current
+                text = f"{name}... {time.perf_counter() - start:.1f}s"
+                if self._queued > 1:
+                    text += f" (+{self._queued - 1})"
+                return text
+            if self._last and time.monotonic() - self._last[1] < STATUS_TIME:
+                return self._last[0]
+        return None
+
+    def shutdown(self, wait=True):
+        # Pending saves still finish when waiting
+        self._executor.shutdown(wait=wait)
+
+    # Board tasks
+
+    def save(self, path=SAVE_FILE):
+        board = self.simulation.snapshot()
+        return self.submit("Save", lambda: write_board(path, board))
+
+    def load(self, path=SAVE_FILE):
+        return self.submit("Load", lambda: read_board(path), self.simulation.load_board)
+
+    def randomize(self, density=None, region=None):
+        # The board is drawn from the simulation's generator on the worker
+        # and keeps the current generation, like Simulation.randomize
+        simulation = self.simulation
+        width, height = simulation.width, simulation.height
+        density = simulation.density if density is None else density
+        return self.submit("Random board",
+                           lambda: Snapshot(random_soup(width, height, density, simulation.rng, region),
+                                            None, None, ""),
+                           simulation.load_board)
+
+    def place_pattern(self, pattern, x=None, y=None, reset=False):
+        # Pattern files are read on the worker
+        simulation = self.simulation
+        return self.submit("Pattern", lambda: simulation.pattern_cells(pattern),
+                           lambda cells: simulation.place_cells(cells, x, y, reset))
+
+    def load_pattern(self, pattern):
+        return self.place_pattern(pattern, reset=True)